@@ -3,13 +3,17 @@ import torch.nn as nn
 import torch.optim as optim
 import random
 import numpy as np
-from collections import deque
+from replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
 
 class DQNAgent:
-    def __init__(self, state_size, action_size):
+    def __init__(self, state_size, action_size, memory_size=10000, prioritized=False):
         self.state_size = state_size
         self.action_size = action_size
-        self.memory = deque(maxlen=10000)
+        self.prioritized = prioritized
+        if prioritized:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_size)
+        else:
+            self.memory = ReplayBuffer(memory_size, state_size)
         self.gamma = 0.95
         self.epsilon = 1.0
         self.epsilon_decay = 0.995
@@ -25,6 +29,7 @@ class DQNAgent:
         self.optimizer = optim.Adam(self.model.parameters(), lr=self.learning_rate)
         self.update_target_steps = 100  # how often to sync target net
         self.step_count = 0
+        self.last_loss = None  # loss of the latest replay, kept as a tensor to avoid a device sync
 
     def _build_model(self):
         return nn.Sequential(
@@ -36,7 +41,11 @@ class DQNAgent:
         )
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        # Store one transition per parallel environment in a single write
+        self.memory.add_batch(states, actions, rewards, next_states, dones)
 
     def act(self, state):
         if np.random.rand() <= self.epsilon:
@@ -46,16 +55,28 @@ class DQNAgent:
             q_values = self.model(state)
         return torch.argmax(q_values).item()
 
+    def act_batch(self, states):
+        """
+        Epsilon-greedy actions for a batch of states with a single forward pass.
+        :param states: Array of shape (N, state_size).
+        :return: Integer array of shape (N,).
+        """
+        states = np.asarray(states, dtype=np.float32)
+        with torch.inference_mode():
+            q_values = self.model(torch.as_tensor(states, device=self.device))
+        actions = q_values.argmax(dim=1).cpu().numpy()
+        explore = np.random.rand(len(states)) <= self.epsilon
+        actions[explore] = np.random.randint(self.action_size, size=int(explore.sum()))
+        return actions
+
     def replay(self, batch_size):
         if len(self.memory) < batch_size:
             return
-        minibatch = random.sample(self.memory, batch_size)
-
-        states = torch.FloatTensor(np.array([x[0] for x in minibatch])).to(self.device)
-        actions = torch.LongTensor([x[1] for x in minibatch]).to(self.device)
-        rewards = torch.FloatTensor([x[2] for x in minibatch]).to(self.device)
-        next_states = torch.FloatTensor(np.array([x[3] for x in minibatch])).to(self.device)
-        dones = torch.FloatTensor([x[4] for x in minibatch]).to(self.device)
+        if self.prioritized:
+            idx, weights = self.memory.sample_prioritized(batch_size)
+            states, actions, rewards, next_states, dones = self.memory.get(idx, self.device)
+        else:
+            states, actions, rewards, next_states, dones = self.memory.sample(batch_size, self.device)
 
         q_values = self.model(states)
         q_values = q_values.gather(1, actions.unsqueeze(1)).squeeze(1)
@@ -63,11 +84,19 @@ class DQNAgent:
         next_q_values = self.target_model(next_states).max(1)[0]
         targets = rewards + (1 - dones) * self.gamma * next_q_values.detach()
 
-        loss = self.criterion(q_values, targets)
+        if self.prioritized:
+            # Importance-sampling weighted MSE, then refresh priorities from the new TD errors
+            td_errors = targets - q_values
+            weights = torch.from_numpy(weights).to(self.device)
+            loss = (weights * td_errors.pow(2)).mean()
+            self.memory.update_priorities(idx, td_errors.detach().cpu().numpy())
+        else:
+            loss = self.criterion(q_values, targets)
 
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
+        self.last_loss = loss.detach()
 
         # Epsilon decay
         if self.epsilon > self.epsilon_min:
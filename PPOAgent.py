@@ -2,8 +2,7 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from collections import deque
-import random
+from rollout_buffer import RolloutBuffer, compute_gae
 
 class ActorCritic(nn.Module):
     def __init__(self, state_size, action_size, hidden_size=64):
@@ -26,10 +25,12 @@ class ActorCritic(nn.Module):
         return policy, value
 
 class PPOAgent:
-    def __init__(self, state_size, action_size, gamma=0.99, lr=3e-4, clip_epsilon=0.2, batch_size=64, update_steps=4):
+    def __init__(self, state_size, action_size, gamma=0.99, lr=3e-4, clip_epsilon=0.2, batch_size=64, update_steps=4,
+                 num_envs=1, rollout_length=1000, gae_lambda=0.95):
         self.state_size = state_size
         self.action_size = action_size
         self.gamma = gamma
+        self.gae_lambda = gae_lambda
         self.clip_epsilon = clip_epsilon
         self.lr = lr
         self.batch_size = batch_size
@@ -39,7 +40,11 @@ class PPOAgent:
         self.model = ActorCritic(state_size, action_size).to(self.device)
         self.optimizer = optim.Adam(self.model.parameters(), lr=self.lr)
 
-        self.memory = []
+        # Holds rollout_length steps from each of num_envs environments between updates. A single
+        # environment's buffer grows past rollout_length, so episodes of any length fit between updates;
+        # with several environments the caller must call update() every rollout_length steps.
+        self.memory = RolloutBuffer(rollout_length, num_envs, state_size, growable=num_envs == 1)
+        self.last_loss = None  # mean loss of the latest update, kept as a tensor to avoid a device sync
 
     def select_action(self, state):
         state = torch.FloatTensor(state).unsqueeze(0).to(self.device)
@@ -48,47 +53,72 @@ class PPOAgent:
         action = dist.sample()
         return action.item(), dist.log_prob(action).item()
 
+    def act(self, states):
+        """
+        Samples actions for a batch of states with a single forward pass.
+        :param states: Array of shape (N, state_size).
+        :return: (actions, log_probs, values) as NumPy arrays of shape (N,).
+        """
+        with torch.inference_mode():
+            states = torch.as_tensor(np.asarray(states, dtype=np.float32), device=self.device)
+            probs, values = self.model(states)
+            dist = torch.distributions.Categorical(probs)
+            actions = dist.sample()
+            log_probs = dist.log_prob(actions)
+        return actions.cpu().numpy(), log_probs.cpu().numpy(), values.squeeze(-1).cpu().numpy()
+
     def store(self, transition):
-        self.memory.append(transition)
+        """
+        Stores (state, action, log_prob, reward, done, value) for one time step. With several
+        environments each element holds one entry per environment.
+        """
+        self.memory.add(*transition)
 
     def compute_returns_and_advantages(self, rewards, values, dones, next_value):
-        returns = []
-        advantages = []
-        gae = 0
-        value = next_value
-        for step in reversed(range(len(rewards))):
-            delta = rewards[step] + self.gamma * value * (1 - dones[step]) - values[step]
-            gae = delta + self.gamma * 0.95 * (1 - dones[step]) * gae
-            advantages.insert(0, gae)
-            value = values[step]
-            returns.insert(0, gae + values[step])
-        return returns, advantages
-
-    def update(self):
-        states, actions, log_probs_old, rewards, dones, values = zip(*self.memory)
-
-        states = torch.FloatTensor(states).to(self.device)
-        actions = torch.LongTensor(actions).to(self.device)
-        log_probs_old = torch.FloatTensor(log_probs_old).to(self.device)
-        values = torch.FloatTensor(values).to(self.device)
-
-        with torch.no_grad():
-            _, next_value = self.model(states[-1].unsqueeze(0))
-        next_value = next_value.item()
-
-        returns, advantages = self.compute_returns_and_advantages(rewards, values, dones, next_value)
-        returns = torch.FloatTensor(returns).to(self.device)
-        advantages = torch.FloatTensor(advantages).to(self.device)
-
+        return compute_gae(rewards, values, dones, next_value, self.gamma, self.gae_lambda)
+
+    def update(self, next_states=None):
+        """
+        Runs the PPO update on the stored rollout and clears it.
+        :param next_states: States following the last stored step, used to bootstrap the returns.
+            Without them the value of the last stored state is used instead.
+        """
+        memory = self.memory
+        T = memory.pos
+        if T == 0:
+            return
+
+        if next_states is not None:
+            with torch.no_grad():
+                next_states = torch.as_tensor(np.asarray(next_states, dtype=np.float32)).view(memory.num_envs, -1)
+                _, next_value = self.model(next_states.to(self.device))
+            next_value = next_value.squeeze(1).cpu().numpy()
+        else:
+            next_value = memory.values[T - 1].numpy()
+
+        returns, advantages = self.compute_returns_and_advantages(
+            memory.rewards[:T].numpy(), memory.values[:T].numpy(), memory.dones[:T].numpy(), next_value)
+
+        # Flattened (T * num_envs, ...) views of the stored rollout
+        n = T * memory.num_envs
+        states = memory.states[:T].reshape(n, self.state_size).to(self.device)
+        actions = memory.actions[:T].reshape(n).to(self.device)
+        log_probs_old = memory.log_probs[:T].reshape(n).to(self.device)
+        returns = torch.from_numpy(returns).reshape(n).to(self.device)
+        advantages = torch.from_numpy(advantages).reshape(n).to(self.device)
+
+        total_loss, num_batches = 0.0, 0
         for _ in range(self.update_steps):
-            idx = np.random.permutation(len(states))
-            for i in range(0, len(states), self.batch_size):
-                batch_idx = idx[i:i+self.batch_size]
-                s_batch = states[batch_idx]
-                a_batch = actions[batch_idx]
-                logp_old_batch = log_probs_old[batch_idx]
-                adv_batch = advantages[batch_idx]
-                ret_batch = returns[batch_idx]
+            # Shuffle once per epoch so every minibatch below is a contiguous slice (a view)
+            idx = torch.randperm(n, device=self.device)
+            s_all, a_all, logp_all = states[idx], actions[idx], log_probs_old[idx]
+            adv_all, ret_all = advantages[idx], returns[idx]
+            for i in range(0, n, self.batch_size):
+                s_batch = s_all[i:i+self.batch_size]
+                a_batch = a_all[i:i+self.batch_size]
+                logp_old_batch = logp_all[i:i+self.batch_size]
+                adv_batch = adv_all[i:i+self.batch_size]
+                ret_batch = ret_all[i:i+self.batch_size]
 
                 probs, value = self.model(s_batch)
                 dist = torch.distributions.Categorical(probs)
@@ -99,15 +129,18 @@ class PPOAgent:
                 surr1 = ratio * adv_batch
                 surr2 = torch.clamp(ratio, 1 - self.clip_epsilon, 1 + self.clip_epsilon) * adv_batch
                 actor_loss = -torch.min(surr1, surr2).mean()
-                critic_loss = nn.MSELoss()(value.squeeze(), ret_batch)
+                critic_loss = nn.MSELoss()(value.squeeze(-1), ret_batch)
 
                 loss = actor_loss + 0.5 * critic_loss
 
                 self.optimizer.zero_grad()
                 loss.backward()
                 self.optimizer.step()
+                total_loss = total_loss + loss.detach()
+                num_batches += 1
 
-        self.memory = []
+        self.last_loss = total_loss / num_batches
+        memory.reset()
 
     def save(self, filename):
         torch.save(self.model.state_dict(), filename)
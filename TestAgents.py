@@ -1,3 +1,4 @@
+import os
 import time
 
 from PPOAgent import PPOAgent
@@ -5,6 +6,25 @@ from DQNAgent import DQNAgent
 from SpiralAgent import SpiralAgent
 from greedy_agent import GreedyAgent
 from vacuum_env import VacuumEnv
+from rasterizer import EpisodeRecorder
+from trajectory import TrajectoryRecorder
+
+RECORD_DIR = None  # set to a folder to record the DQN/PPO test episodes offscreen instead of opening a window
+TRAJECTORY_DIR = None  # set to a folder to keep replayable trajectories of the DQN/PPO test episodes
+
+
+def evaluation_env(name, *args, **kwargs):
+    # Windowed environment, or a headless one whose episodes are saved under RECORD_DIR/name,
+    # optionally also writing trajectories to TRAJECTORY_DIR/name (see trajectory.TrajectoryReader)
+    if RECORD_DIR is None:
+        env = VacuumEnv(*args, **kwargs)
+    else:
+        env = VacuumEnv(*args, render_mode=None, **kwargs)
+    if TRAJECTORY_DIR is not None:
+        env = TrajectoryRecorder(env, os.path.join(TRAJECTORY_DIR, name))
+    if RECORD_DIR is not None:
+        env = EpisodeRecorder(env, os.path.join(RECORD_DIR, name))
+    return env
 
 
 def test_spiral_agent():
@@ -14,7 +34,7 @@ def test_spiral_agent():
     env.close()
 
 def test_greedy_agent():
-    env = VacuumEnv(3)
+    env = VacuumEnv(3, track_coverage=True)
     agent = GreedyAgent(env)
     episodes = 10
     total_dirt = len(env.passive_objects)
@@ -26,16 +46,17 @@ def test_greedy_agent():
         done = False
         while not done:
             action = agent.act(state)
-            state, _, done, _ = env.step(action)
+            state, _, done, info = env.step(action)
             env.render()
-        print(f"Episode {i + 1}: Total Dirt Collected: {env.count.dirtCollected}/{total_dirt}, Steps Taken: {env.steps_taken}")
+        print(f"Episode {i + 1}: Total Dirt Collected: {env.count.dirtCollected}/{total_dirt}, Steps Taken: {env.steps_taken}, "
+              f"Coverage: {info['coverage']:.1%}, Revisits: {info['revisit_ratio']:.1%}")
         total_dirt_collected.append(env.count.dirtCollected)
         total_steps_taken.append(env.steps_taken)
     print(f"\nAverage Dirt Collected: {sum(total_dirt_collected)/episodes}/{total_dirt}, Average Steps Taken: {sum(total_steps_taken)/episodes}")
     print(f"Best Dirt Collected: {max(total_dirt_collected)}/{total_dirt}, Least Steps Taken: {min(total_steps_taken)}")
 
 def test_DQNAgent():
-    env = VacuumEnv(3)
+    env = evaluation_env("dqn", 3, track_coverage=True)
     state_size = len(env.update_state())  # Number of state features
     action_size = len(env.action_space)  # Number of possible actions
     agent = DQNAgent(state_size, action_size)
@@ -53,16 +74,18 @@ def test_DQNAgent():
         done = False
         while not done:
             action = agent.act(state)
-            state, reward, done, _ = env.step(action)
+            state, reward, done, info = env.step(action)
             env.render()
-        print(f"Episode {i + 1}: Total Dirt Collected: {env.count.dirtCollected}/{total_dirt}, Steps Taken: {env.steps_taken}")
+        print(f"Episode {i + 1}: Total Dirt Collected: {env.count.dirtCollected}/{total_dirt}, Steps Taken: {env.steps_taken}, "
+              f"Coverage: {info['coverage']:.1%}, Revisits: {info['revisit_ratio']:.1%}")
         total_dirt_collected.append(env.count.dirtCollected)
         total_steps_taken.append(env.steps_taken)
     print(f"\nAverage Dirt Collected: {sum(total_dirt_collected)/episodes}/{total_dirt}, Average Steps Taken: {sum(total_steps_taken)/episodes}")
     print(f"Best Dirt Collected: {max(total_dirt_collected)}/{total_dirt}, Least Steps Taken: {min(total_steps_taken)}")
+    env.close()
 
 def test_PPOAgent():
-    env = VacuumEnv(3, 250, max_steps=1000)
+    env = evaluation_env("ppo", 3, 250, max_steps=1000, track_coverage=True)
     state_size = len(env.update_state())  # Number of state features
     action_size = len(env.action_space)  # Number of possible actions
     agent = PPOAgent(state_size, action_size)
@@ -81,11 +104,13 @@ def test_PPOAgent():
             action, _ = agent.select_action(state)
             state, reward, done, info = env.step(action)
             env.render()
-        print(f"Episode {i + 1}: Total Dirt Collected: {env.count.dirtCollected}/{total_dirt}, Steps Taken: {env.steps_taken}")
+        print(f"Episode {i + 1}: Total Dirt Collected: {env.count.dirtCollected}/{total_dirt}, Steps Taken: {env.steps_taken}, "
+              f"Coverage: {info['coverage']:.1%}, Revisits: {info['revisit_ratio']:.1%}")
         total_dirt_collected.append(env.count.dirtCollected)
         total_steps_taken.append(env.steps_taken)
     print(f"\nAverage Dirt Collected: {sum(total_dirt_collected)/episodes}/{total_dirt}, Average Steps Taken: {sum(total_steps_taken)/episodes}")
     print(f"Best Dirt Collected: {max(total_dirt_collected)}/{total_dirt}, Least Steps Taken: {min(total_steps_taken)}")
+    env.close()
 
 
 
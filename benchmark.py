@@ -0,0 +1,198 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+import torch
+
+from DQNAgent import DQNAgent
+from PPOAgent import PPOAgent
+from dirt_store import DirtStore
+from vacuum_bot import Bot, Counter
+from vacuum_env import VacuumEnv
+
+# Throughput and latency benchmarks for the simulator and learner hot paths.
+# Every run is seeded and the results are printed (or written) as JSON so that
+# runs from before and after a change can be compared directly.
+#
+#   python benchmark.py --output bench.json
+#   python benchmark.py --only env,sensors --quick
+
+DIRT_COUNTS = [25, 100, 1000, 10000, 50000]
+DQN_BATCH_SIZES = [32, 64, 128, 256]
+PPO_ROLLOUT_LENGTHS = [128, 512, 2048]
+LAYOUT_POOLS = [0, 64]
+ENV_IDS = [1, 2, 3, 4, 5, 6]  # 4 and 5 are the warehouse-sized stress layouts, 6 is furnished
+RENDERED_ENV_IDS = [1, 2, 3, 6]  # the stress rooms are far larger than a Tk window
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def measure(fn, repeat, warmup=3, setup=None):
+    """
+    Times repeat calls of fn, running setup (untimed) before each call.
+    :return: Dictionary of latency statistics in microseconds and calls per second.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    times = np.zeros(repeat)
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - start
+    return {
+        "calls": repeat,
+        "mean_us": float(times.mean() * 1e6),
+        "median_us": float(np.median(times) * 1e6),
+        "p95_us": float(np.percentile(times, 95) * 1e6),
+        "per_sec": float(repeat / times.sum()),
+    }
+
+
+def bench_env_step(repeat):
+    results = []
+    for env_id in ENV_IDS:
+        for render in (False, True) if env_id in RENDERED_ENV_IDS else (False,):
+            params = {"env_id": env_id, "render": render}
+            try:
+                env = VacuumEnv(env_id, render_mode="human" if render else None, max_steps=10 ** 9, seed=env_id)
+            except Exception as exc:  # typically no display for Tk
+                results.append({"name": "env_step", "params": params, "skipped": str(exc)})
+                continue
+            env.reset()
+            rng = random.Random(0)
+
+            def step():
+                env.step(rng.randrange(4))
+                env.render()
+
+            results.append({"name": "env_step", "params": params, **measure(step, repeat)})
+            env.close()
+    return results
+
+
+def bench_env_reset(repeat):
+    results = []
+    for env_id in ENV_IDS:
+        for pool in LAYOUT_POOLS:
+            env = VacuumEnv(env_id, render_mode=None, seed=env_id, layout_pool=pool)
+            results.append({"name": "env_reset", "params": {"env_id": env_id, "layout_pool": pool},
+                            **measure(env.reset, repeat)})
+            env.close()
+    return results
+
+
+def _bot_with_dirt(count, size=1000):
+    rng = np.random.default_rng(count)
+    store = DirtStore(rng.integers(0, size, count), rng.integers(0, size, count))
+    return Bot("Bot1", store, Counter(), rng)
+
+
+def _random_pose(bot, rng, size=1000):
+    bot.x, bot.y = rng.uniform(30, size - 30, 2)
+    bot.theta = rng.uniform(0, 2 * math.pi)
+
+
+def bench_sensors(repeat):
+    results = []
+    for count in DIRT_COUNTS:
+        bot = _bot_with_dirt(count)
+        rng = np.random.default_rng(0)
+        params = {"dirt": count}
+        results.append({"name": "detect_dirt", "params": params,
+                        **measure(lambda: bot.detect_dirt(250, math.radians(90)), repeat,
+                                  setup=lambda: _random_pose(bot, rng))})
+
+        def setup():
+            bot.passiveObjects.reset()
+            _random_pose(bot, rng)
+
+        results.append({"name": "collect_dirt", "params": params,
+                        **measure(lambda: bot.collectDirt(None, bot.passiveObjects, bot.counter), repeat,
+                                  setup=setup)})
+    return results
+
+
+def bench_dqn_replay(repeat, state_size=5, action_size=4, memory=10000):
+    results = []
+    for batch_size in DQN_BATCH_SIZES:
+        agent = DQNAgent(state_size, action_size, memory_size=memory)
+        agent.remember_batch(np.random.rand(memory, state_size), np.random.randint(action_size, size=memory),
+                             np.random.rand(memory), np.random.rand(memory, state_size), np.zeros(memory))
+        results.append({"name": "dqn_replay", "params": {"batch_size": batch_size},
+                        **measure(lambda: agent.replay(batch_size), repeat)})
+    return results
+
+
+def bench_ppo_update(repeat, state_size=5, action_size=4):
+    results = []
+    for length in PPO_ROLLOUT_LENGTHS:
+        agent = PPOAgent(state_size, action_size, rollout_length=length)
+        states = np.random.rand(length, state_size).astype(np.float32)
+
+        def fill():
+            for t in range(length):
+                agent.store((states[t], t % action_size, -1.4, 0.1, t == length - 1, 0.0))
+
+        stats = measure(agent.update, repeat, warmup=1, setup=fill)
+        stats["transitions_per_sec"] = stats["per_sec"] * length
+        results.append({"name": "ppo_update", "params": {"rollout_length": length}, **stats})
+    return results
+
+
+BENCHMARKS = {
+    "env": (bench_env_step, 2000),
+    "reset": (bench_env_reset, 2000),
+    "sensors": (bench_sensors, 500),
+    "dqn": (bench_dqn_replay, 200),
+    "ppo": (bench_ppo_update, 5),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulator and learner hot paths.")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="Comma separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="Run a tenth of the default repetitions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    torch.set_num_threads(1)  # keep learner timings comparable between machines
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+    for name in args.only.split(","):
+        fn, repeat = BENCHMARKS[name]
+        seed_everything(args.seed)
+        report["results"].extend(fn(max(repeat // 10, 1) if args.quick else repeat))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
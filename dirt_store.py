@@ -0,0 +1,213 @@
+import math
+import numpy as np
+
+from spatial_index import DirtGrid
+
+# Array-backed storage for dirt. Coordinates live in contiguous float32 arrays
+# indexed by a stable integer id, and collected dirt is only flagged in a
+# boolean alive mask, so pickup never shifts a list and a reset restores the
+# mask instead of allocating new objects. Dirt instances are only built on
+# demand as thin views for the drawing code. On a Tk canvas all dirt is drawn
+# into a single image that is only touched where dirt gets collected.
+# enable_density() additionally keeps a coarse dirt-count grid (the "ceiling
+# camera" map of Bot.map) that collect() decrements and reset() refills in
+# place, so readers can hold on to the array instead of rebuilding it.
+
+DIRT_COLOUR = "grey"
+DIRT_RADIUS = 1  # pixels either side of the centre
+DENSITY_CELL_SIZE = 100.0  # the original Bot.map() resolution: 10x10 cells over a 1000-unit room
+
+
+class DirtStore:
+    def __init__(self, xs, ys, prefix="Dirt_", cell_size=50.0):
+        """
+        :param xs: x-coordinates of the dirt.
+        :param ys: y-coordinates of the dirt.
+        :param prefix: Prefix of each dirt's name, followed by its id.
+        :param cell_size: Cell size of the spatial index used for radius queries.
+        """
+        self.prefix = prefix
+        self.cell_size = cell_size
+        self.layer = None  # PhotoImage holding the drawn dirt
+        self.layer_canvas = None
+        self.density = None  # dirt count per map cell, indexed [x cell, y cell]; see enable_density()
+        self._allocate(xs, ys)
+
+    def _allocate(self, xs, ys):
+        self.xs = np.ascontiguousarray(xs, dtype=np.float32)
+        self.ys = np.ascontiguousarray(ys, dtype=np.float32)
+        self.ids = np.arange(len(self.xs))
+        self.initial_alive = np.ones(len(self.xs), dtype=bool)
+        self.alive = self.initial_alive.copy()
+        self.remaining = len(self.xs)
+        self.index = DirtGrid(self.xs, self.ys, self.cell_size, alive=self.alive)
+        if self.density is not None:
+            self._bin_density()
+
+    @classmethod
+    def from_positions(cls, positions, prefix="Dirt_", cell_size=50.0):
+        xs, ys = zip(*positions) if len(positions) else ((), ())
+        return cls(xs, ys, prefix, cell_size)
+
+    @classmethod
+    def from_objects(cls, objects, prefix="Dirt_", cell_size=50.0):
+        # Wraps a list of Dirt objects; the list order becomes the dirt ids
+        dirt = [obj for obj in objects if isinstance(obj, Dirt)]
+        return cls([d.centreX for d in dirt], [d.centreY for d in dirt], prefix, cell_size)
+
+    @property
+    def total(self):
+        return len(self.xs)
+
+    def __len__(self):
+        # Number of dirt items still on the floor
+        return self.remaining
+
+    def __iter__(self):
+        for idx in np.flatnonzero(self.alive):
+            yield self[idx]
+
+    def __getitem__(self, idx):
+        return Dirt(self.name(idx), float(self.xs[idx]), float(self.ys[idx]))
+
+    def name(self, idx):
+        return f"{self.prefix}{idx}"
+
+    def collect(self, ids):
+        """
+        Marks the given dirt ids as collected.
+        :return: The number of dirt items that were still alive.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = ids[self.alive[ids]]
+        self.alive[ids] = False
+        self.remaining -= len(ids)
+        if self.density is not None and len(ids):
+            np.subtract.at(self.density.reshape(-1), self.density_cells[ids], 1)
+        return len(ids)
+
+    def reset(self, positions=None):
+        """
+        Puts all dirt back on the floor.
+        :param positions: Optional new (x, y) positions. Arrays are overwritten in place when
+            the number of dirt items is unchanged.
+        """
+        if positions is not None:
+            xs, ys = zip(*positions) if len(positions) else ((), ())
+            self.assign(xs, ys)
+            return
+        self.alive[:] = self.initial_alive
+        self.remaining = int(self.alive.sum())
+        if self.density is not None:
+            self._count_density()
+
+    def assign(self, xs, ys, index=None):
+        """
+        Moves the dirt to new coordinates and puts it all back on the floor. The arrays are
+        overwritten in place unless the number of dirt items changed.
+        :param index: Optional DirtGrid already built over these coordinates, which is reused
+            instead of building a new one.
+        """
+        if len(xs) != len(self.xs):
+            self._allocate(xs, ys)
+            return
+        self.xs[:] = xs
+        self.ys[:] = ys
+        if index is not None and index.cell_size == self.cell_size:
+            self.index = index.rebind(self.xs, self.ys, self.alive)
+        else:
+            self.index = DirtGrid(self.xs, self.ys, self.cell_size, alive=self.alive)
+        self.alive[:] = self.initial_alive
+        self.remaining = int(self.alive.sum())
+        if self.density is not None:
+            self._bin_density()
+
+    def enable_density(self, cell_size=DENSITY_CELL_SIZE, width=None, height=None):
+        """
+        Starts maintaining the dirt-count grid. The grid is updated in place from then on, so the
+        returned array can be kept and read at any time, e.g. as an observation.
+        :param cell_size: Width and height of a map cell.
+        :param width: Room width the map covers; defaults to the extent of the dirt.
+        :param height: Room height the map covers; defaults to the extent of the dirt.
+        :return: The int32 grid of shape (ceil(width / cell_size), ceil(height / cell_size)).
+        """
+        if width is None:
+            width = float(self.xs.max()) + 1 if self.total else cell_size
+        if height is None:
+            height = float(self.ys.max()) + 1 if self.total else cell_size
+        shape = (max(int(math.ceil(width / cell_size)), 1), max(int(math.ceil(height / cell_size)), 1))
+        self.density_cell_size = float(cell_size)
+        if self.density is None or self.density.shape != shape:
+            self.density = np.zeros(shape, dtype=np.int32)
+        self._bin_density()
+        return self.density
+
+    def _bin_density(self):
+        # Map cell of every dirt; dirt on or beyond the far walls counts towards the edge cells
+        nx, ny = self.density.shape
+        cx = np.clip(np.floor(self.xs / self.density_cell_size).astype(np.int64), 0, nx - 1)
+        cy = np.clip(np.floor(self.ys / self.density_cell_size).astype(np.int64), 0, ny - 1)
+        self.density_cells = cx * ny + cy
+        self._count_density()
+
+    def _count_density(self):
+        self.density.reshape(-1)[:] = np.bincount(self.density_cells[self.alive], minlength=self.density.size)
+
+    def draw(self, canvas):
+        """
+        Draws all alive dirt into one image item on the canvas.
+        """
+        import tkinter as tk
+
+        width = int(canvas.cget("width"))
+        height = int(canvas.cget("height"))
+        if self.layer is None or self.layer_canvas is not canvas or \
+                (self.layer.width(), self.layer.height()) != (width, height):
+            self.layer = tk.PhotoImage(master=canvas, width=width, height=height)
+        else:
+            self.layer.blank()
+        self.layer_canvas = canvas
+        canvas.delete("dirt")
+        canvas.create_image(0, 0, image=self.layer, anchor="nw", tags="dirt")
+        canvas.tag_lower("dirt")
+        self._paint(np.flatnonzero(self.alive))
+
+    def _paint(self, ids, colour=DIRT_COLOUR):
+        # One put() per dirt, filling its square clipped to the image
+        width, height = self.layer.width(), self.layer.height()
+        for idx in ids:
+            x, y = int(self.xs[idx]), int(self.ys[idx])
+            x0, y0 = max(x - DIRT_RADIUS, 0), max(y - DIRT_RADIUS, 0)
+            x1, y1 = min(x + DIRT_RADIUS + 1, width), min(y + DIRT_RADIUS + 1, height)
+            if x0 < x1 and y0 < y1:
+                self.layer.put(colour, to=(x0, y0, x1, y1))
+
+    def erase(self, canvas, ids):
+        """
+        Removes collected dirt from the canvas image by filling each square with the canvas
+        background, then repaints any neighbour it overlapped.
+        """
+        if self.layer is None or self.layer_canvas is not canvas:
+            return
+        self._paint(ids, canvas.cget("bg"))
+        # Dots overlap when their centres are at most 2 * DIRT_RADIUS apart along each axis
+        for idx in ids:
+            self._paint(self.index.query_radius(float(self.xs[idx]), float(self.ys[idx]), 3 * DIRT_RADIUS))
+
+
+class Dirt:
+    # A single piece of dirt; DirtStore hands these out as views for drawing
+    __slots__ = ("centreX", "centreY", "name")
+
+    def __init__(self,namep,xx,yy):
+        self.centreX = xx
+        self.centreY = yy
+        self.name = namep
+
+    def draw(self,canvas):
+        body = canvas.create_oval(self.centreX-1,self.centreY-1,\
+                                  self.centreX+1,self.centreY+1,\
+                                  fill="grey",tags=self.name)
+
+    def getLocation(self):
+        return self.centreX, self.centreY
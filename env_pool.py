@@ -0,0 +1,131 @@
+import multiprocessing as mp
+import numpy as np
+
+from vacuum_env import VacuumEnv
+from seeding import spawn_seeds
+
+# Runs K VacuumEnv instances in worker processes so that training scripts can
+# collect experience from all of them at once. Observations, rewards and the
+# per-episode statistics are written by the workers straight into shared
+# memory; the pipes only carry short command messages. Each worker seeds its
+# env with its own child of one SeedSequence.
+
+
+def _worker(index, remote, env_kwargs, seed, buffers):
+    obs, rewards, dones, actions, dirt_collected, steps_taken, terminal_obs = (
+        np.frombuffer(buf, dtype=dtype).reshape(shape) for buf, dtype, shape in buffers
+    )
+    env = VacuumEnv(**env_kwargs, seed=seed)
+    try:
+        while True:
+            cmd = remote.recv()
+            if cmd == "step":
+                state, reward, done, _ = env.step(int(actions[index]))
+                if env.render_mode == "human":
+                    env.render()
+                rewards[index] = reward
+                dones[index] = done
+                dirt_collected[index] = env.count.dirtCollected
+                steps_taken[index] = env.steps_taken
+                terminal_obs[index] = state
+                if done:
+                    state = env.reset()
+                obs[index] = state
+                remote.send(None)
+            elif cmd == "reset":
+                obs[index] = env.reset()
+                remote.send(None)
+            elif cmd == "close":
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        remote.close()
+
+
+class SubprocVacuumEnv:
+    def __init__(self, num_envs, env_kwargs=None, start_method="spawn", seed=None):
+        """
+        Starts num_envs worker processes, each running its own VacuumEnv.
+        :param num_envs: Number of environments (worker processes) to run.
+        :param env_kwargs: Keyword arguments passed to every VacuumEnv. Defaults to headless.
+        :param start_method: multiprocessing start method for the workers.
+        :param seed: Base seed; every worker gets an independent stream spawned from it.
+        """
+        env_kwargs = dict(env_kwargs or {})
+        env_kwargs.setdefault("render_mode", None)
+        if env_kwargs.get("num_bots", 1) > 1:
+            raise ValueError("SubprocVacuumEnv runs single-bot environments only")
+        if env_kwargs.get("dirt_map") is not None:
+            raise ValueError("SubprocVacuumEnv shares vector observations only; create the envs without dirt_map")
+        self.num_envs = num_envs
+        self.env_kwargs = env_kwargs
+
+        # Build one env in this process to learn the observation and action sizes
+        probe = VacuumEnv(**dict(env_kwargs, render_mode=None))
+        self.observation_size = len(probe.update_state())
+        self.action_space = list(probe.action_space)
+        probe.close()
+
+        ctx = mp.get_context(start_method)
+        specs = [
+            ("obs", np.float64, (num_envs, self.observation_size)),
+            ("rewards", np.float64, (num_envs,)),
+            ("dones", np.bool_, (num_envs,)),
+            ("actions", np.int64, (num_envs,)),
+            ("dirt_collected", np.int64, (num_envs,)),
+            ("steps_taken", np.int64, (num_envs,)),
+            ("terminal_observation", np.float64, (num_envs, self.observation_size)),
+        ]
+        buffers = []
+        for name, dtype, shape in specs:
+            raw = ctx.RawArray("b", int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            buffers.append((raw, dtype, shape))
+            setattr(self, "_" + name, np.frombuffer(raw, dtype=dtype).reshape(shape))
+
+        self.seeds = spawn_seeds(seed, num_envs)
+        self.remotes, self.processes = [], []
+        for i in range(num_envs):
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(target=_worker, args=(i, worker_remote, env_kwargs, self.seeds[i], buffers), daemon=True)
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self.closed = False
+
+    def _broadcast(self, cmd):
+        for remote in self.remotes:
+            remote.send(cmd)
+        for remote in self.remotes:
+            remote.recv()
+
+    def reset(self):
+        # Reset every environment and return the stacked initial observations
+        self._broadcast("reset")
+        return self._obs.copy()
+
+    def step(self, actions):
+        """
+        Steps every environment with its action. Finished episodes are reset automatically.
+        :param actions: Integer array of shape (num_envs,).
+        :return: (observations, rewards, dones, infos) with the same layout as VecVacuumEnv.step.
+        """
+        self._actions[:] = actions
+        self._broadcast("step")
+        infos = {
+            "dirt_collected": self._dirt_collected.copy(),
+            "steps_taken": self._steps_taken.copy(),
+            "terminal_observation": self._terminal_observation.copy(),
+        }
+        return self._obs.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def close(self):
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send("close")
+        for process in self.processes:
+            process.join()
+        self.closed = True
@@ -0,0 +1,145 @@
+import math
+import numpy as np
+
+# Floor coverage of an episode. The room is divided into square cells of a
+# boolean bitmap, and every move stamps the area swept by the bot's body (a
+# capsule from its old to its new centre) into it. Only the window of
+# cells around the move is touched, so a step costs the same in any room size.
+# A cell counts as a visit when the body enters it during a step, i.e. it is in
+# the swept capsule but was not under the body where the step started, which
+# keeps a bot that creeps forward over fresh floor at a revisit ratio of 0.
+#
+#   cov = CoverageMap(1000, 1000)
+#   cov.reset([(x, y)])
+#   cov.stamp(x0, y0, x1, y1); cov.end_step()
+#   cov.fraction, cov.revisit_ratio, cov.time_to
+
+COVERAGE_CELL_SIZE = 10.0
+FOOTPRINT_RADIUS = 30.0  # half the 60-unit body (Bot.ll)
+COVERAGE_THRESHOLDS = (0.25, 0.5, 0.75, 0.9)
+
+
+class CoverageMap:
+    def __init__(self, width, height, cell_size=COVERAGE_CELL_SIZE, radius=FOOTPRINT_RADIUS,
+                 thresholds=COVERAGE_THRESHOLDS, blocked=None):
+        """
+        :param width: Room width in canvas units.
+        :param height: Room height in canvas units.
+        :param cell_size: Width and height of a coverage cell.
+        :param radius: Radius of the bot's footprint.
+        :param thresholds: Coverage fractions whose first step is recorded in time_to.
+        :param blocked: Optional boolean grid of this map's shape marking cells taken by obstacles,
+            which are never counted as covered.
+        """
+        self.cell_size = float(cell_size)
+        self.radius = float(radius)
+        self.thresholds = tuple(thresholds)
+        self.nx = max(int(math.ceil(width / self.cell_size)), 1)
+        self.ny = max(int(math.ceil(height / self.cell_size)), 1)
+        self.visited = np.zeros((self.ny, self.nx), dtype=bool)  # indexed [y cell, x cell]
+        self._cx = (np.arange(self.nx) + 0.5) * self.cell_size  # cell centres
+        self._cy = ((np.arange(self.ny) + 0.5) * self.cell_size)[:, None]
+        self.blocked = blocked
+        self.free = self.visited.size  # cells that can be covered
+        if blocked is not None:
+            if blocked.shape != self.visited.shape:
+                raise ValueError(f"blocked has shape {blocked.shape}, expected {self.visited.shape}")
+            self.free = max(int(blocked.size - np.count_nonzero(blocked)), 1)
+        self.reset()
+
+    def reset(self, positions=()):
+        """
+        Clears the map for a new episode.
+        :param positions: (x, y) start positions of the bots, whose footprints count as covered.
+        """
+        self.visited.fill(False)
+        self.covered = 0
+        self.entered = 0  # cells entered by a footprint, with repeats
+        self.revisits = 0  # entered cells that were already covered
+        self.steps = 0
+        self.time_to = dict.fromkeys(self.thresholds)
+        self._next = 0  # index of the next threshold to reach
+        for x, y in positions:
+            self._stamp(x, y, x, y, count=False)
+        self._check_thresholds()
+
+    @property
+    def fraction(self):
+        return self.covered / self.free
+
+    @property
+    def revisit_ratio(self):
+        # Share of the cell entries that went over floor already covered this episode
+        return self.revisits / self.entered if self.entered else 0.0
+
+    def stamp(self, x0, y0, x1, y1):
+        """
+        Stamps the area swept by a footprint moving in a straight line from (x0, y0) to (x1, y1).
+        :return: Number of cells covered for the first time.
+        """
+        return self._stamp(x0, y0, x1, y1, count=True)
+
+    def _stamp(self, x0, y0, x1, y1, count):
+        r, s = self.radius, self.cell_size
+        if count and x0 == x1 and y0 == y1:
+            return 0  # turning on the spot does not enter any cell
+        i0 = max(int((min(x0, x1) - r) // s), 0)
+        i1 = min(int((max(x0, x1) + r) // s) + 1, self.nx)
+        j0 = max(int((min(y0, y1) - r) // s), 0)
+        j1 = min(int((max(y0, y1) + r) // s) + 1, self.ny)
+        if i0 >= i1 or j0 >= j1:
+            return 0
+
+        # Cell centres of the window relative to the start, and their distance to the segment
+        cx = self._cx[i0:i1] - x0
+        cy = self._cy[j0:j1] - y0
+        dx, dy = x1 - x0, y1 - y0
+        length2 = dx * dx + dy * dy
+        r2 = r * r
+        start2 = cx * cx + cy * cy
+        if length2 > 0:
+            # |c - t d|^2 with t the projection of c onto the segment, clipped to its ends
+            proj = cx * dx + cy * dy
+            t = proj * (1.0 / length2)
+            np.maximum(t, 0.0, out=t)
+            np.minimum(t, 1.0, out=t)
+            swept = start2 - t * (2.0 * proj - t * length2) <= r2
+        else:
+            swept = start2 <= r2
+        if count:
+            # Cells under the body where the move started were not entered
+            swept &= start2 > r2
+        if self.blocked is not None:
+            swept &= ~self.blocked[j0:j1, i0:i1]
+
+        window = self.visited[j0:j1, i0:i1]
+        before = np.count_nonzero(window)
+        window |= swept
+        new = np.count_nonzero(window) - before
+        self.covered += new
+        if count:
+            entered = np.count_nonzero(swept)
+            self.entered += entered
+            self.revisits += entered - new
+        return new
+
+    def end_step(self):
+        # Advances the step counter and records the thresholds reached so far
+        self.steps += 1
+        self._check_thresholds()
+
+    def _check_thresholds(self):
+        while self._next < len(self.thresholds) and self.fraction >= self.thresholds[self._next]:
+            self.time_to[self.thresholds[self._next]] = self.steps
+            self._next += 1
+
+    def info(self):
+        """
+        :return: Dictionary with the coverage fraction, the revisit ratio and the step each
+            threshold was first reached at (None while it has not been).
+        """
+        return {
+            "coverage": float(self.fraction),
+            "revisit_ratio": float(self.revisit_ratio),
+            "time_to_coverage": dict(self.time_to),
+        }
@@ -0,0 +1,222 @@
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from vacuum_bot import createObjects, generate_scenario_dirt
+
+# Runs the original vacuum_bot scenario (createObjects with the rule-based
+# brain, ~2.5k dirt) without Tk and without the 50 ms canvas.after() tick, so
+# it goes as fast as the CPU allows. run_scenario() drives the unchanged
+# Brain/Bot/collectDirt code for one bot; RuleBasedBatch re-implements the
+# same rules and kinematics with NumPy arrays to run many independent copies
+# of the scenario at once, which is what parameter sweeps should use.
+#
+#   python headless_runner.py --steps 5000 --runs 4
+#   python headless_runner.py --steps 5000 --batch 512 --seed 0
+
+ROOM_SIZE = 1000     # rule_based_logic and Bot.move assume a 1000x1000 room
+WALL_MARGIN = 30     # Bot.move keeps turning bots this far from the walls
+AXLE_WIDTH = 60      # Bot.ll
+PICKUP_RADIUS = 30   # Bot.collectDirt
+MOVE_SPEED = 5.0     # rule_based_logic wheel speeds
+TURN_SPEED = 2.0
+MOVING_STEPS = (50, 100)   # range of steps a bot drives straight
+TURNING_STEPS = (20, 40)   # range of steps a bot turns on the spot
+CELL_SIZE = 64       # > 2 * PICKUP_RADIUS, so a pickup never touches more than 2x2 cells
+GRID_SIZE = ROOM_SIZE // CELL_SIZE + 1
+
+
+def run_scenario(steps, mode="rule-based", seed=None):
+    """
+    Runs the createObjects scenario headless, stepping the bots exactly like vacuum_bot.moveIt.
+    :param steps: Number of time steps.
+    :param mode: Brain mode.
+    :param seed: Seed (or numpy Generator) for the layout, start pose and brain.
+    :return: Dictionary with the dirt collected, the total dirt, the run time and steps per second.
+    """
+    agents, passiveObjects, count = createObjects(None, mode, seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        for rr in agents:
+            rr.thinkAndAct(agents, passiveObjects)
+            rr.update(None, passiveObjects, 1.0)
+            passiveObjects, dirt_collected = rr.collectDirt(None, passiveObjects, count)
+    elapsed = time.perf_counter() - start
+    return {
+        "steps": steps,
+        "dirt_collected": count.dirtCollected,
+        "total_dirt": passiveObjects.total,
+        "elapsed_s": elapsed,
+        "steps_per_sec": steps / elapsed if elapsed else float("inf"),
+    }
+
+
+class RuleBasedBatch:
+    def __init__(self, num_bots, seed=None):
+        """
+        num_bots independent copies of the createObjects scenario, one rule-based bot each.
+        :param num_bots: Number of scenarios stepped together.
+        :param seed: Seed (or numpy Generator) for the layouts, start poses and brains.
+        """
+        self.num_bots = num_bots
+        self.rng = np.random.default_rng(seed)
+
+        # Dirt is bucketed into a grid of cells per bot, stored as (num_bots, cells + 1, slots)
+        # arrays padded with dead dirt. Pickup then only gathers the 2x2 cells around each bot
+        # instead of testing every dirt item of every scenario. The last cell is always empty.
+        layouts = [generate_scenario_dirt(self.rng) for _ in range(num_bots)]
+        self.total_dirt = np.array([len(xs) for xs, _ in layouts])
+        cells = [self._cell(np.clip(xs // CELL_SIZE, 0, GRID_SIZE - 1), np.clip(ys // CELL_SIZE, 0, GRID_SIZE - 1))
+                 for xs, ys in layouts]
+        slots = max(int(np.bincount(c).max()) for c in cells)
+        shape = (num_bots, GRID_SIZE * GRID_SIZE + 1, slots)
+        self.dirt_x = np.zeros(shape, dtype=np.float32)
+        self.dirt_y = np.zeros(shape, dtype=np.float32)
+        self.dirt_alive = np.zeros(shape, dtype=bool)
+        for i, ((xs, ys), c) in enumerate(zip(layouts, cells)):
+            order = np.argsort(c, kind="stable")
+            c = c[order]
+            slot = np.arange(len(c)) - np.searchsorted(c, c)  # position within its cell
+            self.dirt_x[i, c, slot] = xs[order]
+            self.dirt_y[i, c, slot] = ys[order]
+            self.dirt_alive[i, c, slot] = True
+
+        # Bot pose as drawn by Bot.__init__, and the Brain's counters
+        self.x = self.rng.integers(100, 901, size=num_bots).astype(float)
+        self.y = self.rng.integers(100, 901, size=num_bots).astype(float)
+        self.theta = self.rng.uniform(0.0, 2.0 * math.pi, size=num_bots)
+        self.sl = np.zeros(num_bots)
+        self.sr = np.zeros(num_bots)
+        self.turning = np.zeros(num_bots, dtype=bool)
+        self.turning_count = np.zeros(num_bots, dtype=np.int64)
+        self.moving_count = self.rng.integers(*MOVING_STEPS, size=num_bots)
+        self.dirt_collected = np.zeros(num_bots, dtype=np.int64)
+        self.steps_taken = 0
+
+    @staticmethod
+    def _cell(cx, cy):
+        return cy * GRID_SIZE + cx
+
+    def think(self):
+        # rule_based_logic for every bot
+        turning = self.turning
+        sl = np.where(turning, -TURN_SPEED, MOVE_SPEED)
+        sr = np.where(turning, TURN_SPEED, MOVE_SPEED)
+
+        self.turning_count[turning] -= 1
+        self.moving_count[~turning] -= 1
+        stop_turning = turning & (self.turning_count <= 0)
+        start_turning = ~turning & (self.moving_count <= 0)
+        self.moving_count[stop_turning] = self.rng.integers(*MOVING_STEPS, size=int(stop_turning.sum()))
+        self.turning_count[start_turning] = self.rng.integers(*TURNING_STEPS, size=int(start_turning.sum()))
+        self.turning = (turning & ~stop_turning) | start_turning
+
+        # Reverse when the next step would leave the room
+        flip = (self.x + sl < 0) | (self.x + sl > ROOM_SIZE)
+        sl, sr = np.where(flip, -sl, sl), np.where(flip, -sr, sr)
+        flip = (self.y + sr < 0) | (self.y + sr > ROOM_SIZE)
+        self.sl, self.sr = np.where(flip, -sl, sl), np.where(flip, -sr, sr)
+
+    def move(self, dt=1.0):
+        # Bot.move for every bot, including its update order and turning-only wall clamp
+        straight = self.sl == self.sr
+        turning = ~straight
+        self.x[straight] += self.sr[straight] * np.cos(self.theta[straight])
+        self.y[straight] += self.sr[straight] * np.sin(self.theta[straight])
+
+        if turning.any():
+            sl, sr = self.sl[turning], self.sr[turning]
+            x, y, theta = self.x[turning], self.y[turning], self.theta[turning]
+            R = (AXLE_WIDTH / 2.0) * ((sr + sl) / (sl - sr))
+            omega = (sl - sr) / AXLE_WIDTH
+            icc_x = x - R * np.sin(theta)
+            icc_y = y + R * np.cos(theta)
+            cos_w, sin_w = np.cos(omega * dt), np.sin(omega * dt)
+            x = cos_w * (x - icc_x) - sin_w * (y - icc_y) + icc_x
+            y = sin_w * (x - icc_x) + cos_w * (y - icc_y) + icc_y  # uses the new x, like Bot.move
+            self.theta[turning] = (theta + omega * dt) % (2.0 * math.pi)
+
+            low, high = WALL_MARGIN, ROOM_SIZE - WALL_MARGIN
+            hit_wall = (x < low) | (x > high) | (y < low) | (y > high)
+            self.x[turning] = np.clip(x, low, high)
+            self.y[turning] = np.clip(y, low, high)
+            idx = np.flatnonzero(turning)[hit_wall]
+            self.sl[idx] = 0.0
+            self.sr[idx] = 0.0
+
+    def collect_dirt(self):
+        """
+        Bot.collectDirt for every bot.
+        :return: Number of dirt collected by each bot this step.
+        """
+        empty = GRID_SIZE * GRID_SIZE
+        cx0 = np.floor((self.x - PICKUP_RADIUS) / CELL_SIZE).astype(np.int64)
+        cy0 = np.floor((self.y - PICKUP_RADIUS) / CELL_SIZE).astype(np.int64)
+        cx1 = np.floor((self.x + PICKUP_RADIUS) / CELL_SIZE).astype(np.int64)
+        cy1 = np.floor((self.y + PICKUP_RADIUS) / CELL_SIZE).astype(np.int64)
+        cells = []
+        for cx, cy in ((cx0, cy0), (cx1, cy0), (cx0, cy1), (cx1, cy1)):
+            cells.append(self._cell(cx, cy))
+            # Cells outside the grid, or already listed for this bot, read the empty cell
+            invalid = (cx < 0) | (cx >= GRID_SIZE) | (cy < 0) | (cy >= GRID_SIZE)
+            for previous in cells[:-1]:
+                invalid |= cells[-1] == previous
+            cells[-1] = np.where(invalid, empty, cells[-1])
+        rows = np.arange(self.num_bots)[:, None]
+        cells = np.stack(cells, axis=1)
+
+        dx = self.dirt_x[rows, cells] - self.x[:, None, None]
+        dy = self.dirt_y[rows, cells] - self.y[:, None, None]
+        picked = self.dirt_alive[rows, cells] & (dx * dx + dy * dy < PICKUP_RADIUS ** 2)
+        bot, cell, slot = np.nonzero(picked)
+        self.dirt_alive[bot, cells[bot, cell], slot] = False
+        collected = picked.sum(axis=(1, 2))
+        self.dirt_collected += collected
+        return collected
+
+    def step(self):
+        self.think()
+        self.move(1.0)
+        self.steps_taken += 1
+        return self.collect_dirt()
+
+    def run(self, steps):
+        """
+        Steps every scenario steps times.
+        :return: Dictionary with per-bot dirt collected and totals, the run time and bot-steps per second.
+        """
+        start = time.perf_counter()
+        for _ in range(steps):
+            self.step()
+        elapsed = time.perf_counter() - start
+        return {
+            "steps": steps,
+            "bots": self.num_bots,
+            "dirt_collected": self.dirt_collected.tolist(),
+            "total_dirt": self.total_dirt.tolist(),
+            "elapsed_s": elapsed,
+            "bot_steps_per_sec": steps * self.num_bots / elapsed if elapsed else float("inf"),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the vacuum_bot scenario headless.")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=1, help="Sequential runs of the original Bot/Brain code")
+    parser.add_argument("--batch", type=int, default=0, help="Run this many scenarios at once with RuleBasedBatch")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        results = RuleBasedBatch(args.batch, args.seed).run(args.steps)
+    else:
+        seeds = np.random.SeedSequence(args.seed).spawn(args.runs)
+        results = [run_scenario(args.steps, seed=np.random.default_rng(s)) for s in seeds]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
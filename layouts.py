@@ -0,0 +1,181 @@
+import math
+import numpy as np
+
+from collision import BOT_CLEARANCE, CollisionGrid, as_polygon
+
+# Room layouts. A LayoutSpec describes a rectangular room (width and height in
+# canvas units), how many dirt items it has and how they are distributed, and
+# where the bot starts. Dirt is generated with vectorised NumPy calls, so
+# warehouse-sized rooms (10k x 10k units with 100k+ dirt) are as easy to lay
+# out as the original three rooms. ENV_LAYOUTS maps the env_id arguments of
+# VacuumEnv and VecVacuumEnv to their specs; ids 4 and 5 are large-map stress
+# scenarios. Rooms may contain static obstacles (rectangles or polygons); dirt
+# and random starts are redrawn until they are clear of them, and the
+# CollisionGrid used to move the bot around them is built once per spec.
+
+DISTRIBUTIONS = ("grid", "clustered", "random")
+MAX_ROOM_SIZE = 10000
+MAX_REDRAWS = 100  # attempts at placing dirt or a start clear of the obstacles
+_collision_grids = {}  # (spec, radius) -> CollisionGrid
+
+
+class LayoutSpec:
+    def __init__(self, width, height, dirt_count, distribution="random", bot_start=None, margin=30,
+                 spacing=100, cluster_centre=None, cluster_radius=75, obstacles=()):
+        """
+        :param width: Room width in canvas units.
+        :param height: Room height in canvas units.
+        :param dirt_count: Number of dirt items.
+        :param distribution: One of DISTRIBUTIONS.
+        :param bot_start: Fixed (x, y) start of the bot, or None for a random start.
+        :param margin: Distance from the walls kept free of random dirt and random starts.
+        :param spacing: Distance between grid dirt.
+        :param cluster_centre: Centre of clustered dirt; defaults to a quarter of the room.
+        :param cluster_radius: Half the side of the square clustered dirt is spread over.
+        :param obstacles: Static obstacles, each an (x0, y0, x1, y1) rectangle or a list of (x, y)
+            polygon vertices. Grid dirt inside an obstacle is left out.
+        """
+        if not (0 < width <= MAX_ROOM_SIZE and 0 < height <= MAX_ROOM_SIZE):
+            raise ValueError(f"Room size must be within 1..{MAX_ROOM_SIZE}, got {width}x{height}")
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown dirt distribution: {distribution}")
+        self.width = width
+        self.height = height
+        self.dirt_count = dirt_count
+        self.distribution = distribution
+        self.bot_start = None if bot_start is None else tuple(bot_start)
+        self.margin = margin
+        self.spacing = spacing
+        self.cluster_centre = (width // 4, height // 4) if cluster_centre is None else tuple(cluster_centre)
+        self.cluster_radius = cluster_radius
+        self.obstacles = tuple(as_polygon(obstacle) for obstacle in obstacles)
+        if self.bot_start is not None and self.obstacles and self.collision().overlaps(*self.bot_start):
+            raise ValueError(f"Bot start {self.bot_start} overlaps an obstacle")
+
+    def _key(self):
+        return (self.width, self.height, self.dirt_count, self.distribution, self.bot_start, self.margin,
+                self.spacing, self.cluster_centre, self.cluster_radius, self.obstacles)
+
+    def __eq__(self, other):
+        return isinstance(other, LayoutSpec) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        obstacles = f", {len(self.obstacles)} obstacles" if self.obstacles else ""
+        return (f"LayoutSpec({self.width}x{self.height}, {self.dirt_count} {self.distribution} dirt, "
+                f"start={self.bot_start or 'random'}{obstacles})")
+
+    @property
+    def max_distance(self):
+        # Length of the room's diagonal, used to normalise distances in observations
+        return math.hypot(self.width, self.height)
+
+    def collision(self, radius=BOT_CLEARANCE):
+        # CollisionGrid of the obstacles for a bot of the given radius, shared by every env using this spec
+        key = (self, radius)
+        if key not in _collision_grids:
+            _collision_grids[key] = CollisionGrid(self.width, self.height, self.obstacles, radius)
+        return _collision_grids[key]
+
+    def dirt(self, rng, n=None):
+        """
+        Generates dirt coordinates.
+        :param rng: numpy Generator.
+        :param n: Number of independent copies, or None for a single layout.
+        :return: Integer x and y coordinate arrays of shape (dirt_count,) or (n, dirt_count), with fewer
+            columns for grid dirt when obstacles cover part of the grid.
+        """
+        shape = (self.dirt_count,) if n is None else (n, self.dirt_count)
+        if self.distribution == "grid":
+            cols = int(self.width / self.spacing)
+            i = np.arange(self.dirt_count)
+            xs = (i % cols) * self.spacing + self.spacing // 2
+            ys = (i // cols) * self.spacing + self.spacing // 2
+            if self.obstacles:
+                free = ~self.collision().contains(xs, ys)
+                xs, ys = xs[free], ys[free]
+            shape = shape[:-1] + (len(xs),)
+            return np.broadcast_to(xs, shape), np.broadcast_to(ys, shape)
+        if self.distribution == "clustered":
+            (cx, cy), r = self.cluster_centre, self.cluster_radius
+            low_x, high_x, low_y, high_y = cx - r, cx + r + 1, cy - r, cy + r + 1
+        else:
+            low_x, high_x = self.margin, self.width - self.margin + 1
+            low_y, high_y = self.margin, self.height - self.margin + 1
+        xs = rng.integers(low_x, high_x, size=shape)
+        ys = rng.integers(low_y, high_y, size=shape)
+        if self.obstacles:
+            # Redraw the dirt that landed inside an obstacle
+            for _ in range(MAX_REDRAWS):
+                bad = self.collision().contains(xs, ys)
+                if not bad.any():
+                    break
+                xs[bad] = rng.integers(low_x, high_x, size=int(bad.sum()))
+                ys[bad] = rng.integers(low_y, high_y, size=int(bad.sum()))
+            else:
+                raise ValueError(f"Could not place the dirt of {self!r} clear of its obstacles")
+        return xs, ys
+
+    def start(self, rng, n=None):
+        """
+        Generates bot start positions.
+        :return: x and y as ints, or as float arrays of shape (n,) when n is given.
+        """
+        if self.bot_start is not None:
+            if n is None:
+                return self.bot_start
+            return np.full(n, float(self.bot_start[0])), np.full(n, float(self.bot_start[1]))
+        if self.obstacles:
+            starts = [self._clear_start(rng) for _ in range(1 if n is None else n)]
+            if n is None:
+                return starts[0]
+            xs, ys = zip(*starts)
+            return np.array(xs, dtype=float), np.array(ys, dtype=float)
+        xs = rng.integers(self.margin, self.width - self.margin + 1, size=n)
+        ys = rng.integers(self.margin, self.height - self.margin + 1, size=n)
+        if n is None:
+            return int(xs), int(ys)
+        return xs.astype(float), ys.astype(float)
+
+    def _clear_start(self, rng):
+        grid = self.collision()
+        for _ in range(MAX_REDRAWS):
+            x = int(rng.integers(self.margin, self.width - self.margin + 1))
+            y = int(rng.integers(self.margin, self.height - self.margin + 1))
+            if not grid.overlaps(x, y):
+                return x, y
+        raise ValueError(f"Could not place a bot in {self!r} clear of its obstacles")
+
+
+ENV_LAYOUTS = {
+    # Environment 1 : Small Open room with Grid of dirt, bot in the centre
+    1: LayoutSpec(500, 500, 25, "grid", bot_start=(250, 250), spacing=100),
+    # Environment 2 : Medium Room with Clustered dirt
+    2: LayoutSpec(700, 700, 20, "clustered", bot_start=(600, 600), cluster_radius=75),
+    # Environment 3 : Large Room with Randomly Scattered dirt
+    3: LayoutSpec(1000, 1000, 50, "random"),
+    # Environment 4 : Warehouse aisle, long and narrow
+    4: LayoutSpec(10000, 2000, 20000, "random"),
+    # Environment 5 : Warehouse floor stress test
+    5: LayoutSpec(10000, 10000, 100000, "random"),
+    # Environment 6 : Furnished room split by an interior wall with a doorway
+    6: LayoutSpec(1000, 1000, 50, "random", obstacles=[
+        (480, 0, 500, 450), (480, 600, 500, 1000),  # interior wall
+        (100, 700, 350, 800),  # sofa
+        (650, 300, 850, 420),  # table
+        (620, 270, 632, 282), (868, 270, 880, 282), (620, 438, 632, 450), (868, 438, 880, 450),  # chair legs
+        [(600, 800), (950, 800), (950, 950), (880, 950), (880, 870), (600, 870)],  # kitchen counter
+        [(240, 200), (228, 228), (200, 240), (172, 228), (160, 200), (172, 172), (200, 160), (228, 172)],  # plant
+    ]),
+}
+
+
+def get_layout(layout):
+    # Accepts an env_id or a LayoutSpec
+    if isinstance(layout, LayoutSpec):
+        return layout
+    if layout not in ENV_LAYOUTS:
+        raise ValueError("Invalid environment ID")
+    return ENV_LAYOUTS[layout]
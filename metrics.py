@@ -0,0 +1,168 @@
+import csv
+import queue
+import threading
+import time
+
+# Training metrics without stalling the training loop. MetricsWriter hands rows
+# to a background thread that writes them in batches to CSV (or Parquet when
+# pyarrow is installed), and Dashboard redraws a single reused matplotlib
+# figure at most once every few seconds.
+
+
+class MetricsWriter:
+    def __init__(self, path, fields, flush_interval=1.0, max_batch=256):
+        """
+        :param path: Output file; a .parquet suffix writes Parquet (needs pyarrow), anything else CSV.
+        :param fields: Column names, in order. Missing values in a row are left empty.
+        :param flush_interval: Longest time in seconds a row waits before it is written.
+        :param max_batch: Number of queued rows that triggers a write.
+        """
+        self.path = path
+        self.fields = list(fields)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.parquet = str(path).endswith(".parquet")
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Writing Parquet metrics requires pyarrow") from None
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="MetricsWriter", daemon=True)
+        self._thread.start()
+
+    def log(self, **values):
+        # Queue one row; only the background thread touches the file
+        if self._closed:
+            raise ValueError("MetricsWriter is closed")
+        self._queue.put(values)
+
+    def close(self):
+        # Write everything still queued and stop the background thread
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        sink = _ParquetSink(self.path, self.fields) if self.parquet else _CsvSink(self.path, self.fields)
+        try:
+            done = False
+            while not done:
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.max_batch:
+                    try:
+                        row = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if row is None:
+                        done = True
+                        break
+                    batch.append(row)
+                if batch:
+                    sink.write(batch)
+        finally:
+            sink.close()
+
+
+class _CsvSink:
+    def __init__(self, path, fields):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=fields, extrasaction="ignore")
+        self.writer.writeheader()
+        self.file.flush()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetSink:
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = fields
+        self.writer = None
+
+    def write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({name: [row.get(name) for row in rows] for name in self.fields})
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Dashboard:
+    def __init__(self, panels, min_interval=5.0):
+        """
+        Live plot of per-episode metrics.
+        :param panels: List of (metric name, y-axis label, colour) tuples, one subplot each.
+        :param min_interval: Minimum number of seconds between redraws.
+        """
+        self.panels = panels
+        self.min_interval = min_interval
+        self.history = {name: [] for name, _, _ in panels}
+        self.last_draw = float("-inf")
+        self.fig = None
+
+    def _create_figure(self):
+        import matplotlib.pyplot as plt
+
+        plt.ion()
+        self.fig, axes = plt.subplots(1, len(self.panels), figsize=(6 * len(self.panels), 5), squeeze=False)
+        self.lines = {}
+        for ax, (name, label, colour) in zip(axes[0], self.panels):
+            self.lines[name], = ax.plot([], [], color=colour)
+            ax.set_xlabel("Episode")
+            ax.set_ylabel(label)
+            ax.set_title(f"{label} per Episode")
+            ax.grid(True)
+        self.axes = axes[0]
+        self.fig.tight_layout()
+
+    def update(self, **values):
+        # Record one episode and redraw if enough time has passed
+        for name, value in values.items():
+            if name in self.history:
+                self.history[name].append(value)
+        if time.monotonic() - self.last_draw >= self.min_interval:
+            self.draw()
+
+    def draw(self):
+        import matplotlib.pyplot as plt
+
+        if self.fig is None:
+            self._create_figure()
+        for ax, (name, _, _) in zip(self.axes, self.panels):
+            values = self.history[name]
+            self.lines[name].set_data(range(len(values)), values)
+            ax.relim()
+            ax.autoscale_view()
+        self.fig.canvas.draw_idle()
+        plt.pause(0.001)
+        self.last_draw = time.monotonic()
+
+    def close(self):
+        if self.fig is not None:
+            import matplotlib.pyplot as plt
+
+            plt.close(self.fig)
+            self.fig = None
@@ -0,0 +1,80 @@
+import time
+
+# Low-overhead timers for the phases of VacuumEnv.step. Each phase keeps a
+# call count, a running total and a histogram of durations in power-of-two
+# microsecond buckets. VacuumEnv only creates a profiler when asked to, and
+# every hook is guarded by a single "is not None" check when it is disabled.
+# Drawing happens in render(), after step() has returned its info, so DRAW is
+# reported as a separate per-frame figure and left out of the step mean.
+
+PHASES = ("kinematics", "walls", "collect", "draw", "observe", "reward", "coverage")
+KINEMATICS, WALLS, COLLECT, DRAW, OBSERVE, REWARD, COVERAGE = range(len(PHASES))
+NUM_BUCKETS = 32  # bucket b holds durations in [2^(b-1), 2^b) microseconds
+
+clock = time.perf_counter
+
+
+class StepProfiler:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * len(PHASES)
+        self.totals = [0.0] * len(PHASES)
+        self.hist = [[0] * NUM_BUCKETS for _ in PHASES]
+        self.steps = 0
+        self._step_start = None
+        self._step_measured = 0.0
+
+    def add(self, phase, seconds):
+        """
+        Records one measurement.
+        :param phase: Index into PHASES.
+        :param seconds: Duration of the phase.
+        """
+        self.counts[phase] += 1
+        self.totals[phase] += seconds
+        self.hist[phase][min(int(seconds * 1e6).bit_length(), NUM_BUCKETS - 1)] += 1
+        self._step_measured += seconds
+
+    def start_step(self):
+        self._step_start = clock()
+        self._step_measured = 0.0
+
+    def end_step(self):
+        # Whatever step() spent outside the measured phases is reward shaping and bookkeeping
+        elapsed = clock() - self._step_start
+        self.add(REWARD, max(elapsed - self._step_measured, 0.0))
+        self.steps += 1
+
+    def snapshot(self):
+        return (list(self.counts), list(self.totals), [list(h) for h in self.hist], self.steps)
+
+    def summary(self, since=None):
+        """
+        Summarises the timings, optionally only those recorded after a snapshot().
+        :return: Dictionary with the mean step time (excluding drawing), the mean time to draw a frame
+            and, per phase name, the calls, total seconds, mean microseconds and histogram.
+        """
+        counts, totals, hist, steps = self.snapshot()
+        if since is not None:
+            counts = [a - b for a, b in zip(counts, since[0])]
+            totals = [a - b for a, b in zip(totals, since[1])]
+            hist = [[a - b for a, b in zip(h, h0)] for h, h0 in zip(hist, since[2])]
+            steps -= since[3]
+
+        phases = {}
+        for i, name in enumerate(PHASES):
+            phases[name] = {
+                "calls": counts[i],
+                "total_s": totals[i],
+                "mean_us": totals[i] / counts[i] * 1e6 if counts[i] else 0.0,
+                "hist_us_log2": hist[i],
+            }
+        step_total = sum(totals) - totals[DRAW]
+        return {
+            "steps": steps,
+            "step_mean_us": step_total / steps * 1e6 if steps else 0.0,
+            "frame_mean_us": totals[DRAW] / counts[DRAW] * 1e6 if counts[DRAW] else 0.0,
+            "phases": phases,
+        }
@@ -0,0 +1,281 @@
+import math
+import os
+import zipfile
+
+import numpy as np
+
+from collision import points_in_polygon
+from dirt_store import DIRT_COLOUR, DIRT_RADIUS
+
+# Offscreen rendering without tkinter. Rasterizer draws the same picture as
+# the Tk canvas (room, dirt, detection cone and bot, using Bot.shape()) into
+# an (H, W, 3) uint8 NumPy array, so frames can be captured on servers with no
+# display. FrameWriter streams frames to a compressed .npz (always available)
+# or to .mp4/.gif through imageio, and EpisodeRecorder wraps an environment to
+# record the episodes you select.
+#
+#   env = EpisodeRecorder(VacuumEnv(render_mode=None), "videos", episodes=lambda ep: ep % 10 == 0)
+
+COLOURS = {
+    "white": (255, 255, 255),
+    "grey": (190, 190, 190),
+    "blue": (0, 0, 255),
+    "gold": (255, 215, 0),
+    "red": (255, 0, 0),
+    "green": (0, 255, 0),
+    "yellow": (255, 255, 0),
+    "cyan": (0, 255, 255),
+    "saddle brown": (139, 69, 19),
+}
+ARC_WIDTH = 2
+MAX_FRAME_SIZE = 1000  # longest side of frames fit_scale() picks for large rooms
+VIDEO_FORMATS = ("npz", "mp4", "gif")
+
+
+def fit_scale(width, height, max_size=MAX_FRAME_SIZE):
+    # Pixels per canvas unit so that neither side of the frame exceeds max_size
+    return min(1.0, max_size / max(width, height))
+
+
+class Rasterizer:
+    def __init__(self, width, height, scale=1.0, obstacles=()):
+        """
+        :param width: Room width in canvas units.
+        :param height: Room height in canvas units.
+        :param scale: Pixels per canvas unit; use < 1 to shrink frames of large rooms.
+        :param obstacles: Obstacle polygons of the layout, drawn once into the background.
+        """
+        self.scale = scale
+        self.width = max(int(round(width * scale)), 1)
+        self.height = max(int(round(height * scale)), 1)
+        self.background = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.background[:] = COLOURS["white"]
+        for polygon in obstacles:
+            self.fill_shape(self.background, polygon, "saddle brown")
+
+    def new_frame(self):
+        return self.background.copy()
+
+    def render(self, bot, dirt, detection_radius=250, fov_angle=math.radians(90), out=None):
+        """
+        Draws one frame in the same stacking order as the canvas.
+        :param bot: The Bot to draw, or a list of bots.
+        :param dirt: DirtStore; only alive dirt is drawn.
+        :param out: Optional frame to draw into instead of allocating a new one.
+        :return: The (H, W, 3) uint8 frame.
+        """
+        if out is None:
+            frame = self.new_frame()
+        else:
+            frame = out
+            frame[:] = self.background
+        self.draw_dirt(frame, dirt.xs[dirt.alive], dirt.ys[dirt.alive])
+        bots = bot if isinstance(bot, (list, tuple)) else [bot]
+        for bot in bots:
+            self.draw_cone(frame, bot.x, bot.y, bot.theta, detection_radius, fov_angle)
+        for bot in bots:
+            self.draw_bot(frame, bot)
+        return frame
+
+    def render_env(self, env, out=None):
+        # Convenience wrapper for VacuumEnv
+        return self.render(env.agents, env.passive_objects, env.detection, math.radians(env.fov_angle), out)
+
+    def draw_dirt(self, frame, xs, ys):
+        # Every dirt is a (2 * DIRT_RADIUS + 1) square, all set with one fancy-indexed assignment
+        r = int(round(DIRT_RADIUS * self.scale))
+        offsets = np.arange(-r, r + 1)
+        px = np.floor(np.asarray(xs, dtype=np.float64) * self.scale).astype(np.int64)
+        py = np.floor(np.asarray(ys, dtype=np.float64) * self.scale).astype(np.int64)
+        px, py = np.broadcast_arrays(px[:, None, None] + offsets[None, None, :],
+                                     py[:, None, None] + offsets[None, :, None])
+        self._set(frame, px.ravel(), py.ravel(), DIRT_COLOUR)
+
+    def draw_cone(self, frame, x, y, theta, radius, fov_angle):
+        # Outline of the detection arc, heading +- fov_angle / 2 like the canvas arc
+        r = radius * self.scale
+        n = max(int(r * fov_angle) * 2, 2)
+        angles = np.linspace(theta - fov_angle / 2, theta + fov_angle / 2, n)
+        radii = r + np.arange(ARC_WIDTH) - (ARC_WIDTH - 1) / 2
+        px = x * self.scale + np.outer(radii, np.cos(angles))
+        py = y * self.scale + np.outer(radii, np.sin(angles))
+        self._set(frame, np.floor(px).astype(np.int64).ravel(), np.floor(py).astype(np.int64).ravel(), "cyan")
+
+    def draw_bot(self, frame, bot):
+        shape = bot.shape()
+        self.fill_polygon(frame, shape["body"], "blue")
+        self.fill_oval(frame, shape["centre"], "gold")
+        for box, colour in zip(shape["wheels"], shape["wheel_colours"]):
+            self.fill_oval(frame, box, colour)
+        for box in shape["sensors"]:
+            self.fill_oval(frame, box, "yellow")
+
+    def _window(self, x0, y0, x1, y1):
+        # Pixel ranges covering a bounding box in canvas units, clipped to the frame, plus the
+        # canvas coordinates of their pixel centres
+        s = self.scale
+        i0, i1 = max(int(math.floor(x0 * s)), 0), min(int(math.ceil(x1 * s)) + 1, self.width)
+        j0, j1 = max(int(math.floor(y0 * s)), 0), min(int(math.ceil(y1 * s)) + 1, self.height)
+        cx = (np.arange(i0, i1) + 0.5) / s
+        cy = (np.arange(j0, j1) + 0.5) / s
+        return slice(j0, j1), slice(i0, i1), cx[None, :], cy[:, None]
+
+    def fill_polygon(self, frame, points, colour):
+        # Convex polygon given as a flat [x0, y0, x1, y1, ...] list
+        xs, ys = np.asarray(points[0::2], dtype=np.float64), np.asarray(points[1::2], dtype=np.float64)
+        rows, cols, cx, cy = self._window(xs.min(), ys.min(), xs.max(), ys.max())
+        if cx.size == 0 or cy.size == 0:
+            return
+        ex, ey = np.roll(xs, -1) - xs, np.roll(ys, -1) - ys
+        inside_pos = np.ones((cy.shape[0], cx.shape[1]), dtype=bool)
+        inside_neg = inside_pos.copy()
+        for k in range(len(xs)):
+            cross = ex[k] * (cy - ys[k]) - ey[k] * (cx - xs[k])
+            inside_pos &= cross >= 0
+            inside_neg &= cross <= 0
+        frame[rows, cols][inside_pos | inside_neg] = COLOURS[colour]
+
+    def fill_shape(self, frame, polygon, colour):
+        # Any simple polygon, convex or not, given as (x, y) vertices
+        xs, ys = zip(*polygon)
+        rows, cols, cx, cy = self._window(min(xs), min(ys), max(xs), max(ys))
+        if cx.size == 0 or cy.size == 0:
+            return
+        frame[rows, cols][points_in_polygon(cx, cy, polygon)] = COLOURS[colour]
+
+    def fill_oval(self, frame, box, colour):
+        # Axis-aligned ellipse given by its (x0, y0, x1, y1) bounding box, like create_oval
+        x0, y0, x1, y1 = box
+        rows, cols, cx, cy = self._window(x0, y0, x1, y1)
+        if cx.size == 0 or cy.size == 0:
+            return
+        rx, ry = (x1 - x0) / 2, (y1 - y0) / 2
+        inside = ((cx - (x0 + rx)) / rx) ** 2 + ((cy - (y0 + ry)) / ry) ** 2 <= 1.0
+        frame[rows, cols][inside] = COLOURS[colour]
+
+    def _set(self, frame, px, py, colour):
+        keep = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+        frame[py[keep], px[keep]] = COLOURS[colour]
+
+
+class FrameWriter:
+    def __init__(self, path, fps=30):
+        """
+        Streams frames to disk one at a time.
+        :param path: Output file. .npz writes one compressed array per frame (needs nothing
+            extra); .mp4 and .gif are encoded with imageio (mp4 also needs imageio-ffmpeg).
+        :param fps: Frame rate of video files.
+        """
+        self.path = str(path)
+        self.format = os.path.splitext(self.path)[1].lstrip(".").lower()
+        if self.format not in VIDEO_FORMATS:
+            raise ValueError(f"Unsupported frame format: {self.format!r}, expected one of {VIDEO_FORMATS}")
+        self.frames = 0
+        if self.format == "npz":
+            self._zip = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            try:
+                import imageio.v2 as imageio
+            except ImportError:
+                raise ImportError(f"Writing .{self.format} files requires imageio; use .npz instead") from None
+            kwargs = {"fps": fps} if self.format == "mp4" else {"duration": 1000 / fps, "loop": 0}
+            self._writer = imageio.get_writer(self.path, **kwargs)
+
+    def add(self, frame):
+        if self.format == "npz":
+            with self._zip.open(f"frame_{self.frames:06d}.npy", "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(frame), allow_pickle=False)
+        else:
+            self._writer.append_data(frame)
+        self.frames += 1
+
+    def close(self):
+        if self.format == "npz":
+            self._zip.close()
+        else:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_frames(path):
+    """
+    Reads the frames of a .npz file written by FrameWriter.
+    :return: Array of shape (frames, H, W, 3).
+    """
+    with np.load(path) as data:
+        return np.stack([data[name] for name in sorted(data.files)])
+
+
+class EpisodeRecorder:
+    def __init__(self, env, directory, episodes=None, fmt="npz", fps=30, scale=None, prefix="episode"):
+        """
+        Wraps a VacuumEnv and records the selected episodes, one file each. Works with any
+        render_mode, including None, since frames come from the offscreen Rasterizer.
+        :param env: The environment; every other attribute is passed through to it.
+        :param directory: Folder the recordings are written to.
+        :param episodes: Callable taking the episode number (from 0) and returning whether to
+            record it, or a collection of episode numbers. None records every episode.
+        :param fmt: One of VIDEO_FORMATS.
+        :param scale: Pixels per canvas unit of the frames; by default large rooms are shrunk to
+            MAX_FRAME_SIZE pixels.
+        """
+        self.env = env
+        self.directory = directory
+        self.episodes = episodes
+        self.fmt = fmt
+        self.fps = fps
+        self.prefix = prefix
+        if scale is None:
+            scale = fit_scale(env.width, env.height)
+        self.rasterizer = Rasterizer(env.width, env.height, scale, env.layout.obstacles)
+        self.frame = self.rasterizer.new_frame()
+        self.episode = -1
+        self.writer = None
+        self.paths = []  # files written so far
+        os.makedirs(directory, exist_ok=True)
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    def _selected(self, episode):
+        if self.episodes is None:
+            return True
+        if callable(self.episodes):
+            return self.episodes(episode)
+        return episode in self.episodes
+
+    def _capture(self):
+        self.writer.add(self.rasterizer.render_env(self.env, out=self.frame))
+
+    def _finish(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def reset(self, *args, **kwargs):
+        self._finish()
+        state = self.env.reset(*args, **kwargs)
+        self.episode += 1
+        if self._selected(self.episode):
+            path = os.path.join(self.directory, f"{self.prefix}_{self.episode:05d}.{self.fmt}")
+            self.writer = FrameWriter(path, self.fps)
+            self.paths.append(path)
+            self._capture()
+        return state
+
+    def step(self, action):
+        state, reward, done, info = self.env.step(action)
+        if self.writer is not None:
+            self._capture()
+            if done:
+                self._finish()
+        return state, reward, done, info
+
+    def close(self):
+        self._finish()
+        self.env.close()
@@ -0,0 +1,162 @@
+import numpy as np
+import torch
+
+# Experience replay memory backed by preallocated arrays. Transitions are
+# written at a moving index into fixed-size float32 arrays (overwriting the
+# oldest once full), so no Python object is kept per transition and sampling
+# a batch is one vectorized index draw plus one tensor conversion per field.
+
+
+class ReplayBuffer:
+    def __init__(self, capacity, state_size, seed=None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.index = 0  # Next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.index
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.index = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """
+        Writes a batch of transitions, e.g. one per parallel environment.
+        :return: The slots the transitions were written to.
+        """
+        n = len(actions)
+        idx = (self.index + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.index = int((self.index + n) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def sample_indices(self, batch_size):
+        return self.rng.integers(0, self.size, size=batch_size)
+
+    def get(self, idx, device="cpu"):
+        """
+        Gathers the transitions at idx as tensors on the given device.
+        :return: (states, actions, rewards, next_states, dones)
+        """
+        return (
+            torch.from_numpy(self.states[idx]).to(device),
+            torch.from_numpy(self.actions[idx]).to(device),
+            torch.from_numpy(self.rewards[idx]).to(device),
+            torch.from_numpy(self.next_states[idx]).to(device),
+            torch.from_numpy(self.dones[idx]).to(device),
+        )
+
+    def sample(self, batch_size, device="cpu"):
+        return self.get(self.sample_indices(batch_size), device)
+
+
+class SumTree:
+    # Binary tree stored in a flat array: node i has children 2i and 2i + 1, the root is
+    # node 1 and leaf j lives at node leaf_offset + j. Each node holds the sum of its children,
+    # so sampling by prefix sum and updating a priority both take O(log n).
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.depth = max(int(np.ceil(np.log2(capacity))), 0)
+        self.leaf_offset = 1 << self.depth
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, idx):
+        return self.tree[self.leaf_offset + np.asarray(idx)]
+
+    def update(self, idx, priorities):
+        """
+        Sets the priorities of the leaves idx and recomputes their ancestors level by level.
+        """
+        nodes = self.leaf_offset + np.asarray(idx, dtype=np.int64)
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """
+        Finds, for each value in [0, total), the leaf whose prefix-sum range contains it.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0.0)
+            nodes = left + go_right
+        return nodes - self.leaf_offset
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    # Proportional prioritized replay (Schaul et al., 2016). Transitions are sampled with
+    # probability p_i^alpha / sum_k p_k^alpha where p_i is the last absolute TD error, and
+    # importance-sampling weights (N * P(i))^-beta correct for the bias this introduces.
+
+    def __init__(self, capacity, state_size, alpha=0.6, beta=0.4, beta_increment=1e-4, eps=1e-5, seed=None):
+        super().__init__(capacity, state_size, seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def add(self, state, action, reward, next_state, done):
+        # New transitions get the highest priority seen so far so they are replayed at least once
+        i = super().add(state, action, reward, next_state, done)
+        self._set_priorities([i], np.full(1, self.max_priority))
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        idx = super().add_batch(states, actions, rewards, next_states, dones)
+        self._set_priorities(idx, np.full(len(idx), self.max_priority))
+        return idx
+
+    def _set_priorities(self, idx, priorities):
+        # Leaves never drop below eps, so a sampled transition always has a finite weight
+        self.tree.update(idx, np.maximum(priorities ** self.alpha, self.eps))
+
+    def sample_prioritized(self, batch_size):
+        """
+        Draws one index from each of batch_size equal slices of the total priority.
+        :return: The sampled indices and their importance-sampling weights, normalised to a maximum of 1.
+        """
+        total = self.tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        idx = np.minimum(self.tree.find(np.minimum(values, np.nextafter(total, 0))), self.size - 1)
+
+        probs = np.maximum(self.tree.get(idx), self.eps) / total
+        weights = (self.size * probs) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return idx, weights.astype(np.float32)
+
+    def update_priorities(self, idx, td_errors):
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self._set_priorities(idx, priorities)
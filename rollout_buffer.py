@@ -0,0 +1,89 @@
+import numpy as np
+import torch
+
+# Fixed-capacity on-policy storage for PPO. Every field is a preallocated
+# float32 (or int64) tensor of shape (capacity, num_envs, ...) filled one time
+# step at a time for all parallel environments, so an update never has to
+# convert Python lists of transitions. A growable buffer doubles its capacity
+# when it fills instead of refusing more steps, for callers that update once
+# per episode of unknown length.
+
+
+class RolloutBuffer:
+    def __init__(self, capacity, num_envs, state_size, growable=False):
+        """
+        :param capacity: Number of time steps stored before the buffer is full.
+        :param num_envs: Number of environments stored per time step.
+        :param state_size: Number of state features.
+        :param growable: Double the capacity when full instead of raising ValueError.
+        """
+        self.capacity = capacity
+        self.growable = growable
+        self.num_envs = num_envs
+        self.state_size = state_size
+        self.states = torch.zeros((capacity, num_envs, state_size), dtype=torch.float32)
+        self.actions = torch.zeros((capacity, num_envs), dtype=torch.int64)
+        self.log_probs = torch.zeros((capacity, num_envs), dtype=torch.float32)
+        self.rewards = torch.zeros((capacity, num_envs), dtype=torch.float32)
+        self.dones = torch.zeros((capacity, num_envs), dtype=torch.float32)
+        self.values = torch.zeros((capacity, num_envs), dtype=torch.float32)
+        self.pos = 0  # Number of time steps stored
+
+    def __len__(self):
+        return self.pos * self.num_envs
+
+    @property
+    def full(self):
+        return self.pos == self.capacity
+
+    def add(self, states, actions, log_probs, rewards, dones, values):
+        """
+        Stores one time step for every environment. Each argument has a leading
+        num_envs dimension, or is a scalar when there is a single environment.
+        """
+        if self.full:
+            if not self.growable:
+                raise ValueError("Rollout buffer is full; call update() before storing more transitions")
+            self._grow()
+        t = self.pos
+        self.states[t] = torch.as_tensor(np.asarray(states, dtype=np.float32)).view(self.num_envs, self.state_size)
+        self.actions[t] = torch.as_tensor(np.asarray(actions, dtype=np.int64))
+        self.log_probs[t] = torch.as_tensor(np.asarray(log_probs, dtype=np.float32))
+        self.rewards[t] = torch.as_tensor(np.asarray(rewards, dtype=np.float32))
+        self.dones[t] = torch.as_tensor(np.asarray(dones, dtype=np.float32))
+        self.values[t] = torch.as_tensor(np.asarray(values, dtype=np.float32))
+        self.pos += 1
+
+    def _grow(self):
+        # Doubles the capacity, keeping the stored steps
+        for name in ("states", "actions", "log_probs", "rewards", "dones", "values"):
+            field = getattr(self, name)
+            setattr(self, name, torch.cat([field, torch.zeros_like(field)]))
+        self.capacity *= 2
+
+    def reset(self):
+        self.pos = 0
+
+
+def compute_gae(rewards, values, dones, next_value, gamma, gae_lambda):
+    """
+    Generalised advantage estimation with a single reverse scan over time.
+    :param rewards: Array of shape (T,) or (T, num_envs).
+    :param values: Value estimates with the same shape as rewards.
+    :param dones: Done flags with the same shape as rewards.
+    :param next_value: Value estimate of the state after the last step, shape () or (num_envs,).
+    :return: (returns, advantages) arrays with the same shape as rewards.
+    """
+    rewards = np.asarray(rewards, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    not_done = 1.0 - np.asarray(dones, dtype=np.float32)
+
+    advantages = np.zeros_like(rewards)
+    gae = np.zeros_like(rewards[0])
+    value = np.asarray(next_value, dtype=np.float32)
+    for step in reversed(range(len(rewards))):
+        delta = rewards[step] + gamma * value * not_done[step] - values[step]
+        gae = delta + gamma * gae_lambda * not_done[step] * gae
+        advantages[step] = gae
+        value = values[step]
+    return advantages + values, advantages
@@ -0,0 +1,22 @@
+import numpy as np
+
+# Seeding helpers. Every environment owns a numpy.random.Generator instead of
+# sharing the global random module, and parallel environments get their own
+# child streams spawned from one SeedSequence, so K workers built from the same
+# seed are reproducible and never share (or correlate) their layouts.
+
+
+def spawn_seeds(seed, n):
+    """
+    Derives independent seeds for n environments.
+    :param seed: Base seed (int, SeedSequence or None for fresh OS entropy).
+    :return: List of n SeedSequence objects, each accepted by VacuumEnv(seed=...) and np.random.default_rng.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n)
+
+
+def draw_seed(rng):
+    # Integer seed drawn from a generator, e.g. to reseed an episode so it can be replayed
+    return int(rng.integers(2 ** 63))
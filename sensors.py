@@ -0,0 +1,176 @@
+import math
+import numpy as np
+
+# NumPy kernels for the bot's sensors. They compute the same quantities as the
+# per-object loop that used to live in Bot.detect_dirt, but over whole arrays
+# of dirt (and, for the batched forms, many robots) in one call.
+# The range sensor (lidar) casts R rays per bot: walls are intersected
+# exactly, and obstacles and dirt are found by marching every ray over an
+# occupancy grid in one vectorised DDA.
+
+LIDAR_RAYS = 32
+LIDAR_RANGE = 300.0
+
+
+def wrap_angle(angle):
+    # Normalize to [-π, π]
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def detect_in_cone(xs, ys, x, y, theta, detection_radius, cone_angle):
+    """
+    Finds the nearest dirt within a radius and cone in front of a single bot.
+    :param xs: x-coordinates of the candidate dirt.
+    :param ys: y-coordinates of the candidate dirt.
+    :param x: Bot x-coordinate.
+    :param y: Bot y-coordinate.
+    :param theta: Bot heading in radians.
+    :param detection_radius: The radius within which to detect dirt.
+    :param cone_angle: The half-angle of the detection cone in radians.
+    :return: A tuple (distance, angle) to the nearest dirt, or (None, None) if no dirt is found.
+    """
+    dx = np.asarray(xs, dtype=np.float64) - x
+    dy = np.asarray(ys, dtype=np.float64) - y
+    distance = np.sqrt(dx * dx + dy * dy)
+
+    # Only take angles of the dirt that is close enough
+    near = np.flatnonzero(distance <= detection_radius)
+    if len(near) == 0:
+        return None, None
+    angle = wrap_angle(np.arctan2(dy[near], dx[near]) - theta)
+    in_cone = np.abs(angle) <= cone_angle
+    if not in_cone.any():
+        return None, None
+
+    distance = np.where(in_cone, distance[near], np.inf)
+    nearest = distance.argmin()
+    return float(distance[nearest]), float(angle[nearest])
+
+
+def detect_in_cone_batch(xs, ys, alive, x, y, theta, detection_radius, cone_angle):
+    """
+    Batched detect_in_cone for N bots.
+    :param xs: Dirt x-coordinates, shape (D,) when the bots share a room or (N, D) for one room per bot.
+    :param ys: Dirt y-coordinates with the same shape as xs.
+    :param alive: Boolean mask of dirt still on the floor with the same shape as xs, or None.
+    :param x: Bot x-coordinates, shape (N,).
+    :param y: Bot y-coordinates, shape (N,).
+    :param theta: Bot headings, shape (N,).
+    :param detection_radius: The radius within which to detect dirt.
+    :param cone_angle: The half-angle of the detection cone in radians.
+    :return: Arrays (distance, angle) of shape (N,), NaN where no dirt is visible.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    dx = np.asarray(xs, dtype=np.float64) - x[:, None]
+    dy = np.asarray(ys, dtype=np.float64) - np.asarray(y, dtype=np.float64)[:, None]
+    distance = np.sqrt(dx * dx + dy * dy)
+    angle = wrap_angle(np.arctan2(dy, dx) - np.asarray(theta)[:, None])
+
+    visible = (distance <= detection_radius) & (np.abs(angle) <= cone_angle)
+    if alive is not None:
+        visible &= alive
+    distance = np.where(visible, distance, np.inf)
+    nearest = distance.argmin(axis=1)
+    rows = np.arange(len(x))
+    found = visible[rows, nearest]
+    return (np.where(found, distance[rows, nearest], np.nan),
+            np.where(found, angle[rows, nearest], np.nan))
+
+
+def ray_offsets(num_rays, fov=2 * math.pi):
+    # Ray directions relative to the heading, spread evenly over the field of view
+    if fov >= 2 * math.pi:
+        return np.linspace(-math.pi, math.pi, num_rays, endpoint=False)
+    return np.linspace(-fov / 2, fov / 2, num_rays)
+
+
+def march_grid(ox, oy, dx, dy, limit, grid):
+    """
+    DDA over a boolean grid for many rays at once. The boundary crossings of every ray are
+    generated up front and merged in sorted order, which visits the same cells as stepping
+    cell by cell but without a Python loop over the steps.
+    :param ox: Ray origins in cell units, shape (M,).
+    :param oy: Ray origins in cell units, shape (M,).
+    :param dx: Unit ray directions, shape (M,).
+    :param dy: Unit ray directions, shape (M,).
+    :param limit: Length of each ray in cell units, shape (M,). Rays must stay inside the grid.
+    :param grid: Boolean grid indexed [y cell, x cell].
+    :return: Distance in cell units to the first set cell on each ray, inf where there is none.
+    """
+    # Axis-parallel rays get a negligible slope instead of infinite crossing times
+    dx = np.where(dx == 0, 1e-12, dx)
+    dy = np.where(dy == 0, 1e-12, dy)
+    k = np.arange(int(math.ceil(limit.max())) + 1)
+    tx = ((np.floor(ox) + (dx > 0) - ox) / dx)[:, None] + k * np.abs(1 / dx)[:, None]
+    ty = ((np.floor(oy) + (dy > 0) - oy) / dy)[:, None] + k * np.abs(1 / dy)[:, None]
+    ts = np.concatenate([np.zeros((len(ox), 1)), tx, ty], axis=1)
+    ts.sort(axis=1)
+
+    # The cell of each stretch between two crossings is the one its midpoint lies in
+    mids = np.minimum((ts[:, :-1] + ts[:, 1:]) * 0.5, limit[:, None])
+    ny, nx = grid.shape
+    ix = np.minimum((ox[:, None] + mids * dx[:, None]).astype(np.int64), nx - 1)
+    iy = np.minimum((oy[:, None] + mids * dy[:, None]).astype(np.int64), ny - 1)
+    iy *= nx
+    iy += ix
+    hit = np.take(grid.reshape(-1), iy)
+    first = hit.argmax(axis=1)
+    rows = np.arange(len(ox))
+    t = ts[rows, first]
+    return np.where(hit[rows, first] & (t < limit), t, np.inf)
+
+
+def range_scan_batch(x, y, theta, offsets, max_range, width, height, occupancy=None, cell_size=None,
+                     dirt=None, dirt_cell_size=None):
+    """
+    Lidar for N bots: R rays per bot measuring the distance to the nearest wall or obstacle, and
+    optionally to the nearest map cell holding dirt that is not hidden behind them.
+    :param x: Bot x-coordinates, shape (N,).
+    :param y: Bot y-coordinates, shape (N,).
+    :param theta: Bot headings, shape (N,).
+    :param offsets: Ray directions relative to the heading, shape (R,); see ray_offsets.
+    :param max_range: Longest distance a ray measures; rays that hit nothing read max_range.
+    :param width: Room width; the walls are hit exactly.
+    :param height: Room height.
+    :param occupancy: Optional obstacle grid indexed [y cell, x cell] (CollisionGrid.occupancy).
+    :param cell_size: Cell size of the occupancy grid.
+    :param dirt: Optional dirt-count grid indexed [x cell, y cell] (DirtStore.density).
+    :param dirt_cell_size: Cell size of the dirt grid.
+    :return: Distances of shape (N, R), or (distances, dirt distances) when dirt is given.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    angles = np.asarray(theta, dtype=np.float64)[:, None] + np.asarray(offsets)[None, :]
+    shape = angles.shape
+    dx, dy = np.cos(angles).ravel(), np.sin(angles).ravel()
+    ox, oy = np.repeat(x, shape[1]), np.repeat(y, shape[1])
+
+    # Walls: the first of the two room edges each ray heads towards
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_x = np.where(dx > 0, (width - ox) / dx, np.where(dx < 0, -ox / dx, np.inf))
+        t_y = np.where(dy > 0, (height - oy) / dy, np.where(dy < 0, -oy / dy, np.inf))
+    distance = np.minimum(np.minimum(t_x, t_y), max_range)
+
+    if occupancy is not None and occupancy.any():
+        t = march_grid(ox / cell_size, oy / cell_size, dx, dy, distance / cell_size, occupancy)
+        distance = np.minimum(distance, t * cell_size)
+    if dirt is None:
+        return distance.reshape(shape)
+
+    t = march_grid(ox / dirt_cell_size, oy / dirt_cell_size, dx, dy, distance / dirt_cell_size, (dirt > 0).T)
+    t *= dirt_cell_size
+    dirt_distance = np.minimum(t, max_range)
+    return distance.reshape(shape), dirt_distance.reshape(shape)
+
+
+def range_scan(x, y, theta, offsets, max_range, width, height, occupancy=None, cell_size=None,
+               dirt=None, dirt_cell_size=None):
+    """
+    range_scan_batch for a single bot.
+    :return: Distances of shape (R,), or (distances, dirt distances).
+    """
+    scan = range_scan_batch([x], [y], [theta], offsets, max_range, width, height, occupancy, cell_size,
+                            dirt, dirt_cell_size)
+    if dirt is None:
+        return scan[0]
+    return scan[0][0], scan[1][0]
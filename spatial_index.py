@@ -0,0 +1,93 @@
+import copy
+import math
+import numpy as np
+
+# Uniform grid over dirt positions. Dirt ids are bucketed by cell once, sorted
+# row-major, so a radius query only has to slice the rows of cells covered by
+# the query's bounding box instead of scanning every piece of dirt. Collected
+# dirt is removed by clearing its entry in the alive mask.
+
+
+class DirtGrid:
+    def __init__(self, xs, ys, cell_size=50.0, alive=None):
+        """
+        Builds the grid over the given dirt coordinates.
+        :param xs: x-coordinates of the dirt, indexed by dirt id.
+        :param ys: y-coordinates of the dirt, indexed by dirt id.
+        :param cell_size: Width and height of a grid cell.
+        :param alive: Optional boolean mask of dirt that has not been collected yet.
+        """
+        # Arrays are kept by reference so a DirtStore can share its coordinates
+        self.xs = np.asarray(xs)
+        self.ys = np.asarray(ys)
+        self.cell_size = float(cell_size)
+        self.alive = np.ones(len(self.xs), dtype=bool) if alive is None else alive
+
+        if len(self.xs):
+            cx = np.floor(self.xs / self.cell_size).astype(np.int64)
+            cy = np.floor(self.ys / self.cell_size).astype(np.int64)
+            self.origin_x, self.origin_y = int(cx.min()), int(cy.min())
+            cx -= self.origin_x
+            cy -= self.origin_y
+            self.nx, self.ny = int(cx.max()) + 1, int(cy.max()) + 1
+        else:
+            cx = cy = np.zeros(0, dtype=np.int64)
+            self.origin_x = self.origin_y = 0
+            self.nx = self.ny = 1
+
+        cells = cy * self.nx + cx
+        self.order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=self.nx * self.ny)
+        self.starts = np.concatenate(([0], np.cumsum(counts)))
+
+    @classmethod
+    def from_objects(cls, objects, cell_size=50.0):
+        """
+        Builds a grid over a list of Dirt objects; dirt ids are positions in that list.
+        """
+        xs = [obj.centreX for obj in objects]
+        ys = [obj.centreY for obj in objects]
+        return cls(xs, ys, cell_size)
+
+    def rebind(self, xs, ys, alive):
+        """
+        Returns a copy of the grid over other arrays holding the same coordinates, e.g. a
+        DirtStore refilled from a cached layout, without bucketing the dirt again.
+        """
+        grid = copy.copy(self)
+        grid.xs, grid.ys, grid.alive = xs, ys, alive
+        return grid
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def candidates(self, x, y, radius):
+        """
+        Returns the ids of alive dirt in every cell overlapping the square around (x, y).
+        Callers still have to apply their exact distance test.
+        """
+        cx0 = max(int(math.floor((x - radius) / self.cell_size)) - self.origin_x, 0)
+        cx1 = min(int(math.floor((x + radius) / self.cell_size)) - self.origin_x, self.nx - 1)
+        cy0 = max(int(math.floor((y - radius) / self.cell_size)) - self.origin_y, 0)
+        cy1 = min(int(math.floor((y + radius) / self.cell_size)) - self.origin_y, self.ny - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.zeros(0, dtype=np.int64)
+
+        # Cells in one row of the box are contiguous in the sorted order
+        rows = [self.order[self.starts[cy * self.nx + cx0]:self.starts[cy * self.nx + cx1 + 1]]
+                for cy in range(cy0, cy1 + 1)]
+        ids = rows[0] if len(rows) == 1 else np.concatenate(rows)
+        return ids[self.alive[ids]]
+
+    def query_radius(self, x, y, radius):
+        """
+        Returns the ids of alive dirt within radius of (x, y).
+        """
+        ids = self.candidates(x, y, radius)
+        dx = self.xs[ids].astype(np.float64) - x
+        dy = self.ys[ids].astype(np.float64) - y
+        return ids[dx * dx + dy * dy <= radius * radius]
+
+    def remove(self, ids):
+        # Mark collected dirt so that later queries skip it
+        self.alive[ids] = False
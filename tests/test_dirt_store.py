@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from dirt_store import DirtStore
+
+tk = pytest.importorskip("tkinter")
+
+
+@pytest.fixture
+def canvas():
+    # Needs a display; run under xvfb-run on headless machines
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    canvas = tk.Canvas(root, width=100, height=100, bg="white")
+    yield canvas
+    root.destroy()
+
+
+def test_erase_clears_dirt_and_repaints_neighbours(canvas):
+    store = DirtStore(np.array([50, 52, 80]), np.array([50, 50, 80]))
+    store.draw(canvas)
+    grey, white = canvas.winfo_rgb("grey"), canvas.winfo_rgb("white")
+    pixel = lambda x, y: tuple(c * 257 for c in store.layer.get(x, y))
+
+    store.collect(np.array([0]))
+    store.erase(canvas, [0])
+    assert pixel(49, 50) == white  # only dirt 0 covered this pixel
+    assert pixel(51, 50) == grey  # shared with dirt 1, which is still there
+    assert pixel(80, 80) == grey
@@ -0,0 +1,15 @@
+import numpy as np
+
+from replay_buffer import PrioritizedReplayBuffer
+
+
+def test_weights_stay_finite_after_zero_priorities():
+    buffer = PrioritizedReplayBuffer(64, state_size=5, seed=0)
+    states = np.zeros((40, 5))
+    idx = buffer.add_batch(states, np.zeros(40, dtype=np.int64), np.zeros(40), states, np.zeros(40, dtype=bool))
+    buffer.update_priorities(idx, np.zeros(len(idx)))
+    assert (buffer.tree.get(idx) >= buffer.eps).all()
+    for _ in range(100):
+        sampled, weights = buffer.sample_prioritized(32)
+        assert (sampled < buffer.size).all()
+        assert np.isfinite(weights).all() and weights.max() == 1.0
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from PPOAgent import PPOAgent
+from rollout_buffer import RolloutBuffer
+
+
+def test_single_env_agent_stores_past_rollout_length():
+    agent = PPOAgent(state_size=5, action_size=4, rollout_length=8)
+    for t in range(9):
+        agent.store((np.full(5, t), t % 4, -1.0, 1.0, False, 0.5))
+    assert agent.memory.pos == 9
+    assert agent.memory.states[8, 0, 0].item() == 8
+    assert agent.memory.states[0, 0, 0].item() == 0
+    agent.update()
+    assert agent.memory.pos == 0
+
+
+def test_fixed_buffer_raises_when_full():
+    buffer = RolloutBuffer(2, num_envs=2, state_size=3)
+    for _ in range(2):
+        buffer.add(np.zeros((2, 3)), [0, 1], [0.0, 0.0], [1.0, 1.0], [False, False], [0.0, 0.0])
+    with pytest.raises(ValueError):
+        buffer.add(np.zeros((2, 3)), [0, 1], [0.0, 0.0], [1.0, 1.0], [False, False], [0.0, 0.0])
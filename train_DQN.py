@@ -1,125 +1,118 @@
 import time
-import logging
-from vacuum_env import VacuumEnv
+import numpy as np
+from env_pool import SubprocVacuumEnv
+from metrics import MetricsWriter, Dashboard
 from DQNAgent import DQNAgent
-import matplotlib.pyplot as plt
-from IPython.display import clear_output
 
 
 # Hyperparameters
 EPISODES = 250
 BATCH_SIZE = 32
-
-logging.basicConfig(
-    filename="DQN_training_log.csv",
-    filemode="w",
-    format="%(message)s",
-    level=logging.INFO
-)
-logging.info("episode, total_reward, dirt_collected, elapsed_time, total_time")  # CSV header
-
-# Initialise environment and agent
-env = VacuumEnv(1, 300, 60,500 )
-state_size = len(env.update_state())  # Number of state features
-action_size = len(env.action_space)  # Number of possible actions
-agent = DQNAgent(state_size, action_size)
-total_time = 0
-total_actions = 0
-
-# Training loop
-for episode in range(EPISODES):
-    state = env.reset()
-    # if episode <300:
-    #     env.bot.x  = 250
-    #     env.bot.y  = 250
-    total_reward = 0
-    done = False
-    action_count = {"forward": 0, "backward": 0, "left": 0, "right": 0}
-
-    start_time = time.time()  # Start time for the episode
-
-    while not done:
-        # Render the environment (optional)
-        env.render()
-
-        # Agent selects an action
-        action = agent.act(state)
-
-
-        # Environment responds to the action
-        next_state, reward, done, _ = env.step(action)
-        total_actions += 1
-        if action == 0:
-            action_count["forward"] += 1
-        elif action == 1:
-            action_count["backward"] += 1
-        elif action == 2:
-            action_count["left"] += 1
-        elif action == 3:
-            action_count["right"] += 1
-
-        # Store experience in replay memory
-        agent.remember(state, action, reward, next_state, done)
-
-        # Update state and accumulate reward
-        state = next_state
-        total_reward += reward
-
-        # Train the agent with a batch of experiences
+PRIORITIZED_REPLAY = False  # Replay transitions in proportion to their TD error
+RENDER = False  # Open a Tk window per environment while training (needs a display)
+NUM_ENVS = 8  # Environments stepped in parallel worker processes
+REPLAYS_PER_STEP = 1  # Gradient updates (and epsilon decays) per environment step, as with a single env
+SEED = None  # Base seed of the environments' random streams; None draws fresh entropy
+PLOT = False  # Live reward/dirt plot, redrawn at most every PLOT_INTERVAL seconds
+PLOT_INTERVAL = 5.0
+ACTION_NAMES = ["forward", "backward", "left", "right"]
+METRIC_FIELDS = ["episode", "total_reward", "dirt_collected", "elapsed_time", "total_time",
+                 "steps_per_sec", "loss"] + ACTION_NAMES
+
+
+def new_action_count():
+    return {name: 0 for name in ACTION_NAMES}
+
+
+def main():
+    # Metrics are written by a background thread; plotting is optional and throttled
+    metrics = MetricsWriter("DQN_training_log.csv", METRIC_FIELDS)
+    dashboard = Dashboard([("total_reward", "Reward", None), ("dirt_collected", "Dirt Cleaned", "green")],
+                          min_interval=PLOT_INTERVAL) if PLOT else None
+
+    # Initialise environments and agent
+    env = SubprocVacuumEnv(NUM_ENVS, dict(env_id=1, detection_radius=300, fov_angle=60, max_steps=500,
+                                          render_mode="human" if RENDER else None), seed=SEED)
+    state_size = env.observation_size  # Number of state features
+    action_size = len(env.action_space)  # Number of possible actions
+    agent = DQNAgent(state_size, action_size, prioritized=PRIORITIZED_REPLAY)
+    train_start = time.time()
+    total_actions = 0
+
+    # Per-environment episode statistics
+    episode_rewards = np.zeros(NUM_ENVS)
+    action_counts = [new_action_count() for _ in range(NUM_ENVS)]
+    start_times = [time.time()] * NUM_ENVS
+    episode = 0
+
+    # Training loop: every environment steps once per iteration and is reset automatically when done
+    states = env.reset()
+    while episode < EPISODES:
+        # Agent selects an action for each environment
+        actions = agent.act_batch(states)
+
+        # Environments respond to the actions
+        next_states, rewards, dones, infos = env.step(actions)
+        total_actions += NUM_ENVS
+
+        for i in range(NUM_ENVS):
+            action_counts[i][ACTION_NAMES[actions[i]]] += 1
+        episode_rewards += rewards
+
+        # Store experience in replay memory; finished envs have already been reset
+        final_states = np.where(dones[:, None], infos["terminal_observation"], next_states)
+        agent.remember_batch(states, actions, rewards, final_states, dones)
+
+        # Update state
+        states = next_states
+
+        # Train the agent with batches of experiences; one iteration is NUM_ENVS environment steps
         if total_actions > BATCH_SIZE:
-            agent.replay(BATCH_SIZE)
-
-    end__time = time.time()  # End time for the episode
-    elapsed_time = end__time - start_time
-    total_time += elapsed_time
-
-    # Log training metrics
-    logging.info(f"{episode + 1},{total_reward}, {env.count.dirtCollected},{elapsed_time:.2f},{total_time:.2f}")
-
-    # Keep history for plotting
-    if episode == 0:
-        reward_history = []
-        dirt_history = []
-
-    reward_history.append(total_reward)
-    dirt_history.append(env.count.dirtCollected)
-
-    # Live plot
-    clear_output(wait=True)
-    plt.figure(figsize=(12, 5))
-
-    plt.subplot(1, 2, 1)
-    plt.plot(reward_history, label="Total Reward")
-    plt.xlabel("Episode")
-    plt.ylabel("Reward")
-    plt.title("Reward per Episode")
-    plt.grid(True)
-
-    plt.subplot(1, 2, 2)
-    plt.plot(dirt_history, label="Dirt Collected", color='green')
-    plt.xlabel("Episode")
-    plt.ylabel("Dirt Cleaned")
-    plt.title("Dirt Cleaned per Episode")
-    plt.grid(True)
-
-    plt.tight_layout()
-    plt.show()
-
-
-# Convert times to minutes:seconds format
-    elapsed_minutes, elapsed_seconds = divmod(int(elapsed_time), 60)
-    total_minutes, total_seconds = divmod(int(total_time), 60)
-
-    print(f"Episode {episode + 1}/{EPISODES}, Total Reward: {total_reward:0.2f}, "
-            f"Dirt Collected: {env.count.dirtCollected}, "
-          f"Time Taken: {elapsed_minutes}:{elapsed_seconds:02d}, "
-          f"Total Time: {total_minutes}:{total_seconds:02d}")
-
-    print(f"Episode {episode + 1}: {action_count}")
-
-# Save the trained model
-print(agent.epsilon)
-agent.save("dqn_model.pth")
-
-# Close the environment
-env.close()
\ No newline at end of file
+            for _ in range(NUM_ENVS * REPLAYS_PER_STEP):
+                agent.replay(BATCH_SIZE)
+
+        for i in np.flatnonzero(dones):
+            if episode >= EPISODES:
+                break
+            total_reward = episode_rewards[i]
+            dirt_collected = infos["dirt_collected"][i]
+            elapsed_time = time.time() - start_times[i]
+            total_time = time.time() - train_start
+
+            # Log training metrics
+            loss = agent.last_loss.item() if agent.last_loss is not None else None
+            metrics.log(episode=episode + 1, total_reward=total_reward, dirt_collected=dirt_collected,
+                        elapsed_time=elapsed_time, total_time=total_time,
+                        steps_per_sec=total_actions / total_time, loss=loss, **action_counts[i])
+            if dashboard is not None:
+                dashboard.update(total_reward=total_reward, dirt_collected=dirt_collected)
+
+            # Convert times to minutes:seconds format
+            elapsed_minutes, elapsed_seconds = divmod(int(elapsed_time), 60)
+            total_minutes, total_seconds = divmod(int(total_time), 60)
+
+            print(f"Episode {episode + 1}/{EPISODES}, Total Reward: {total_reward:0.2f}, "
+                  f"Dirt Collected: {dirt_collected}, "
+                  f"Time Taken: {elapsed_minutes}:{elapsed_seconds:02d}, "
+                  f"Total Time: {total_minutes}:{total_seconds:02d}")
+
+            print(f"Episode {episode + 1}: {action_counts[i]}")
+
+            episode += 1
+            episode_rewards[i] = 0
+            action_counts[i] = new_action_count()
+            start_times[i] = time.time()
+
+    # Save the trained model
+    print(agent.epsilon)
+    agent.save("dqn_model.pth")
+
+    # Close the environments and flush the metrics
+    env.close()
+    metrics.close()
+    if dashboard is not None:
+        dashboard.close()
+
+
+if __name__ == '__main__':
+    main()
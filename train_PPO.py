@@ -1,111 +1,106 @@
 import time
-import logging
-import torch
-import matplotlib.pyplot as plt
-from IPython.display import clear_output
-from vacuum_env import VacuumEnv
+import numpy as np
+from env_pool import SubprocVacuumEnv
+from metrics import MetricsWriter, Dashboard
 from PPOAgent import PPOAgent  # Make sure this matches your PPOAgent file
 
 # Hyperparameters
 EPISODES = 250
 MAX_STEPS = 1000
-
-# Logging setup
-logging.basicConfig(
-    filename="PPO_training_log.csv",
-    filemode="w",
-    format="%(message)s",
-    level=logging.INFO
-)
-logging.info("episode, total_reward, dirt_collected, elapsed_time")
-
-# Create environment and agent
-env = VacuumEnv(1, detection_radius=250, max_steps=MAX_STEPS)
-state_size = len(env.update_state())
-action_size = len(env.action_space)
-agent = PPOAgent(state_size, action_size)
-total_time = 0
-
-# Training loop
-for episode in range(EPISODES):
-    state = env.reset()
-    total_reward = 0
-    done = False
-    action_count = {"forward": 0, "backward": 0, "left": 0, "right": 0}
-    start_time = time.time()
-
-    while not done:
-        env.render()
-        action, log_prob = agent.select_action(state)
-        next_state, reward, done, _ = env.step(action)
-
-        if action == 0:
-            action_count["forward"] += 1
-        elif action == 1:
-            action_count["backward"] += 1
-        elif action == 2:
-            action_count["left"] += 1
-        elif action == 3:
-            action_count["right"] += 1
-
-        # Estimate current state value
-        with torch.no_grad():
-            _, value = agent.model(torch.FloatTensor(state).unsqueeze(0).to(agent.device))
-        value = value.item()
-
-        agent.store((state, action, log_prob, reward, done, value))
-        total_reward += reward
-        state = next_state
-
-
-    agent.update()
-
-    elapsed_time = time.time() - start_time
-    total_time += elapsed_time
-
-    logging.info(f"{episode + 1},{total_reward:.2f},{env.count.dirtCollected},{elapsed_time:.2f}")
-
-    # Keep history for plotting
-    if episode == 0:
-        reward_history = []
-        dirt_history = []
-
-    reward_history.append(total_reward)
-    dirt_history.append(env.count.dirtCollected)
-
-    # Live plot
-    clear_output(wait=True)
-    plt.figure(figsize=(12, 5))
-
-    plt.subplot(1, 2, 1)
-    plt.plot(reward_history, label="Total Reward")
-    plt.xlabel("Episode")
-    plt.ylabel("Reward")
-    plt.title("Reward per Episode")
-    plt.grid(True)
-
-    plt.subplot(1, 2, 2)
-    plt.plot(dirt_history, label="Dirt Collected", color='green')
-    plt.xlabel("Episode")
-    plt.ylabel("Dirt Cleaned")
-    plt.title("Dirt Cleaned per Episode")
-    plt.grid(True)
-
-    plt.tight_layout()
-    plt.show()
-
-    elapsed_minutes, elapsed_seconds = divmod(int(elapsed_time), 60)
-    total_minutes, total_seconds = divmod(int(total_time), 60)
-    print(f"Episode {episode + 1}/{EPISODES}, Total Reward: {total_reward:0.2f}, "
-          f"Dirt Collected: {env.count.dirtCollected}, "
-          f"Time Taken: {elapsed_minutes}:{elapsed_seconds:02d}, "
-          f"Total Time: {total_minutes}:{total_seconds:02d}")
-
-    print(f"Episode {episode + 1}: {action_count}")
-
-
-# Save trained model
-agent.save("ppo_model.pth")
-
-# Close environment
-env.close()
+RENDER = False  # Open a Tk window per environment while training (needs a display)
+NUM_ENVS = 8  # Environments stepped in parallel worker processes
+SEED = None  # Base seed of the environments' random streams; None draws fresh entropy
+ROLLOUT_STEPS = 256  # Steps collected from every environment before each update
+PLOT = False  # Live reward/dirt plot, redrawn at most every PLOT_INTERVAL seconds
+PLOT_INTERVAL = 5.0
+ACTION_NAMES = ["forward", "backward", "left", "right"]
+METRIC_FIELDS = ["episode", "total_reward", "dirt_collected", "elapsed_time", "total_time",
+                 "steps_per_sec", "loss"] + ACTION_NAMES
+
+
+def new_action_count():
+    return {name: 0 for name in ACTION_NAMES}
+
+
+def main():
+    # Metrics are written by a background thread; plotting is optional and throttled
+    metrics = MetricsWriter("PPO_training_log.csv", METRIC_FIELDS)
+    dashboard = Dashboard([("total_reward", "Reward", None), ("dirt_collected", "Dirt Cleaned", "green")],
+                          min_interval=PLOT_INTERVAL) if PLOT else None
+
+    # Create environments and agent
+    env = SubprocVacuumEnv(NUM_ENVS, dict(env_id=1, detection_radius=250, max_steps=MAX_STEPS,
+                                          render_mode="human" if RENDER else None), seed=SEED)
+    state_size = env.observation_size
+    action_size = len(env.action_space)
+    agent = PPOAgent(state_size, action_size, num_envs=NUM_ENVS, rollout_length=ROLLOUT_STEPS)
+    train_start = time.time()
+    total_steps = 0
+
+    # Per-environment episode statistics
+    episode_rewards = np.zeros(NUM_ENVS)
+    action_counts = [new_action_count() for _ in range(NUM_ENVS)]
+    start_times = [time.time()] * NUM_ENVS
+    episode = 0
+
+    # Training loop: collect a rollout from every environment, then update
+    states = env.reset()
+    while episode < EPISODES:
+        for _ in range(ROLLOUT_STEPS):
+            # One forward pass gives the actions, their log-probs and the state values
+            actions, log_probs, values = agent.act(states)
+            next_states, rewards, dones, infos = env.step(actions)
+            total_steps += NUM_ENVS
+
+            agent.store((states, actions, log_probs, rewards, dones, values))
+            for i in range(NUM_ENVS):
+                action_counts[i][ACTION_NAMES[actions[i]]] += 1
+            episode_rewards += rewards
+
+            for i in np.flatnonzero(dones):
+                if episode >= EPISODES:
+                    break
+                total_reward = episode_rewards[i]
+                dirt_collected = infos["dirt_collected"][i]
+                elapsed_time = time.time() - start_times[i]
+                total_time = time.time() - train_start
+
+                # Log training metrics
+                loss = agent.last_loss.item() if agent.last_loss is not None else None
+                metrics.log(episode=episode + 1, total_reward=total_reward, dirt_collected=dirt_collected,
+                            elapsed_time=elapsed_time, total_time=total_time,
+                            steps_per_sec=total_steps / total_time, loss=loss, **action_counts[i])
+                if dashboard is not None:
+                    dashboard.update(total_reward=total_reward, dirt_collected=dirt_collected)
+
+                elapsed_minutes, elapsed_seconds = divmod(int(elapsed_time), 60)
+                total_minutes, total_seconds = divmod(int(total_time), 60)
+                print(f"Episode {episode + 1}/{EPISODES}, Total Reward: {total_reward:0.2f}, "
+                      f"Dirt Collected: {dirt_collected}, "
+                      f"Time Taken: {elapsed_minutes}:{elapsed_seconds:02d}, "
+                      f"Total Time: {total_minutes}:{total_seconds:02d}")
+
+                print(f"Episode {episode + 1}: {action_counts[i]}")
+
+                episode += 1
+                episode_rewards[i] = 0
+                action_counts[i] = new_action_count()
+                start_times[i] = time.time()
+
+            states = next_states
+
+        # Bootstrap unfinished episodes from the states the rollout stopped at
+        agent.update(next_states=states)
+
+    # Save trained model
+    agent.save("ppo_model.pth")
+
+    # Close environments and flush the metrics
+    env.close()
+    metrics.close()
+    if dashboard is not None:
+        dashboard.close()
+
+
+if __name__ == '__main__':
+    main()
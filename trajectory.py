@@ -0,0 +1,185 @@
+import json
+import os
+
+import numpy as np
+
+from layouts import LayoutSpec
+from seeding import draw_seed
+
+# Compact on-disk trajectories. TrajectoryRecorder wraps a VacuumEnv and appends
+# every transition (the state the action was chosen from, the action, reward
+# and done flag) to fixed-size memory-mapped .npy chunks, and keeps one row per
+# episode with its first step, length and reset seed. Since the simulation is
+# deterministic given the reset seed, TrajectoryReader.replay() rebuilds any
+# episode by feeding the recorded actions back into a fresh environment,
+# without the policy that produced them.
+#
+#   env = TrajectoryRecorder(VacuumEnv(render_mode=None), "runs/dqn_eval")
+#   ...
+#   for env, state, action, reward, done in TrajectoryReader("runs/dqn_eval").replay(7):
+#       ...
+
+CHUNK_SIZE = 65536  # transitions per chunk file
+FIELDS = ("states", "actions", "rewards", "dones")
+EPISODE_DTYPE = np.dtype([("start", np.int64), ("length", np.int64), ("seed", np.int64)])
+ENV_ARGS = {"env_id": "env_id", "detection_radius": "detection", "fov_angle": "fov_angle", "max_steps": "max_steps",
+            "layout_pool": "layout_pool", "layout_seed": "layout_seed", "lidar_rays": "lidar_rays",
+            "lidar_range": "lidar_range", "lidar_dirt": "lidar_dirt"}
+
+
+def _chunk_path(directory, field, chunk):
+    return os.path.join(directory, f"{field}_{chunk:05d}.npy")
+
+
+class TrajectoryRecorder:
+    def __init__(self, env, directory, chunk_size=CHUNK_SIZE):
+        """
+        :param env: The VacuumEnv to record; every other attribute is passed through to it.
+        :param directory: Folder for the chunk files, episodes.npy and meta.json.
+        :param chunk_size: Number of transitions per chunk file.
+        """
+        if getattr(env, "num_bots", 1) > 1:
+            raise ValueError("TrajectoryRecorder records single-bot environments only")
+        if getattr(env, "dirt_map", None) is not None:
+            raise ValueError("TrajectoryRecorder records vector observations only; create the env without dirt_map")
+        self.env = env
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.state_size = len(env.state_space)
+        self.env_kwargs = {arg: getattr(env, attr) for arg, attr in ENV_ARGS.items()}
+        self.env_kwargs["layout"] = dict(vars(env.layout))
+        self.steps = 0
+        self.episodes = []  # [start, seed] per episode; lengths follow from the next start
+        self.chunks = None
+        self.state = None
+        os.makedirs(directory, exist_ok=True)
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    def _open_chunk(self, chunk):
+        shapes = {
+            "states": ((self.chunk_size, self.state_size), np.float32),
+            "actions": ((self.chunk_size,), np.int64),
+            "rewards": ((self.chunk_size,), np.float32),
+            "dones": ((self.chunk_size,), np.bool_),
+        }
+        self.chunks = {field: np.lib.format.open_memmap(_chunk_path(self.directory, field, chunk), mode="w+",
+                                                        dtype=dtype, shape=shape)
+                       for field, (shape, dtype) in shapes.items()}
+
+    def _flush_chunk(self):
+        if self.chunks is not None:
+            for array in self.chunks.values():
+                array.flush()
+            self.chunks = None
+
+    def reset(self, seed=None, **kwargs):
+        """
+        Resets the environment with a seed that is stored with the episode.
+        :param seed: Reset seed; when None one is drawn from the env's own generator, so a seeded
+            env records the same sequence of episodes every run.
+        """
+        if seed is None:
+            seed = draw_seed(self.env.rng)
+        self.state = self.env.reset(seed=seed, **kwargs)
+        self.episodes.append((self.steps, seed))
+        return self.state
+
+    def step(self, action):
+        if self.state is None:
+            raise RuntimeError("Call reset() before step()")
+        chunk, row = divmod(self.steps, self.chunk_size)
+        if row == 0:
+            self._flush_chunk()
+            self._open_chunk(chunk)
+        state, reward, done, info = self.env.step(action)
+        self.chunks["states"][row] = self.state
+        self.chunks["actions"][row] = action
+        self.chunks["rewards"][row] = reward
+        self.chunks["dones"][row] = done
+        self.steps += 1
+        self.state = state
+        return state, reward, done, info
+
+    def flush(self):
+        # Writes the episode table and metadata so a reader sees everything recorded so far
+        for array in (self.chunks or {}).values():
+            array.flush()
+        episodes = np.zeros(len(self.episodes), dtype=EPISODE_DTYPE)
+        if self.episodes:
+            starts, seeds = zip(*self.episodes)
+            episodes["start"] = starts
+            episodes["seed"] = seeds
+            episodes["length"] = np.diff(np.append(episodes["start"], self.steps))
+        np.save(os.path.join(self.directory, "episodes.npy"), episodes)
+        meta = {"steps": self.steps, "chunk_size": self.chunk_size, "state_size": self.state_size,
+                "env_kwargs": self.env_kwargs}
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def close(self):
+        self.flush()
+        self._flush_chunk()
+        self.env.close()
+
+
+class TrajectoryReader:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.episodes = np.load(os.path.join(directory, "episodes.npy"))
+        self.steps = self.meta["steps"]
+        self.chunk_size = self.meta["chunk_size"]
+        num_chunks = -(-self.steps // self.chunk_size)
+        self.chunks = [{field: np.load(_chunk_path(directory, field, chunk), mmap_mode="r") for field in FIELDS}
+                       for chunk in range(num_chunks)]
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def field(self, field, start, stop):
+        # Rows [start, stop) of one field, concatenated across chunk boundaries
+        parts = []
+        while start < stop:
+            chunk, row = divmod(start, self.chunk_size)
+            n = min(stop - start, self.chunk_size - row)
+            parts.append(self.chunks[chunk][field][row:row + n])
+            start += n
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    def episode(self, index):
+        """
+        :return: Dictionary with the episode's seed and its states, actions, rewards and dones arrays.
+        """
+        start, length, seed = self.episodes[index]
+        data = {field: self.field(field, int(start), int(start + length)) for field in FIELDS}
+        data["seed"] = int(seed)
+        return data
+
+    def make_env(self, **kwargs):
+        from vacuum_env import VacuumEnv
+
+        env_kwargs = dict(self.meta["env_kwargs"])
+        env_kwargs["layout"] = LayoutSpec(**env_kwargs["layout"])
+        return VacuumEnv(**{"render_mode": None, **env_kwargs, **kwargs})
+
+    def replay(self, index, env=None, check=True):
+        """
+        Re-simulates an episode from its seed and recorded actions.
+        :param env: Environment to replay in, e.g. one with a window; a headless one is built by default.
+        :param check: Raise if a re-simulated state differs from the recorded one.
+        :return: Generator of (env, state, action, reward, done), where state is what the action was taken from.
+        """
+        data = self.episode(index)
+        env = self.make_env() if env is None else env
+        state = env.reset(seed=data["seed"])
+        for t, action in enumerate(data["actions"]):
+            if check and not np.allclose(state, data["states"][t], atol=1e-5):
+                raise RuntimeError(f"Replay of episode {index} diverged at step {t}")
+            next_state, reward, done, _ = env.step(int(action))
+            yield env, state, int(action), reward, done
+            state = next_state
@@ -1,11 +1,19 @@
-import tkinter as tk
-import random
 import math
 import numpy as np
 
 from DQNAgent import DQNAgent
 from rule_based import rule_based_logic
+from dirt_store import Dirt, DirtStore, DENSITY_CELL_SIZE
+from sensors import detect_in_cone, range_scan, ray_offsets, LIDAR_RAYS, LIDAR_RANGE
 
+try:
+    import tkinter as tk
+except ImportError:  # only needed for the interactive main()
+    tk = None
+
+ROOM_SIZE = 1000  # the createObjects scenario is a 1000x1000 room
+# Wheel speeds (left, right) of the dqn brain's forward, turn left and turn right actions
+DQN_WHEEL_SPEEDS = ((5.0, 5.0), (-2.0, 2.0), (2.0, -2.0))
 
 # The Brain class controls the bot's behavior and decision-making
 class Brain:
@@ -16,9 +24,9 @@ class Brain:
         self.mode = mode
         self.algorithm = None # Placeholder for DQN or other algorithms
         self.turningCount = 0 # how long bot should turn
-        self.movingCount = random.randrange(50,100) # how long bot should move straight
+        self.movingCount = int(self.bot.rng.integers(50, 100)) # how long bot should move straight
         self.currentlyTurning = False
-        self.map = self.bot.map() # get map of dirt from bots sensors
+        self.map = self.bot.map() # get map of dirt from bots sensors; kept up to date as dirt is collected
 
 
     def thinkAndAct(self, x, y, sl, sr, count):
@@ -36,32 +44,38 @@ class Brain:
             return rule_based_logic(self, x, y, sl, sr, count)
         elif self.mode == "dqn":
             if self.algorithm is None:
-                self.algorithm = DQNAgent(self.bot.map.shape[0], 3)  # Example state size and action size
-            # Stub for DQN logic
-            action = self.algorithm.act(self.bot.map.flatten())
+                self.algorithm = DQNAgent(self.map.size, len(DQN_WHEEL_SPEEDS))
+            # Stub for DQN logic: an untrained network acting on the whole dirt map
+            action = self.algorithm.act(self.map.ravel().astype(np.float32))
+            sl, sr = DQN_WHEEL_SPEEDS[action]
+            return sl, sr, None, None
         else:
             raise ValueError(f"Unknown mode: {self.mode}")
 
 # The Bot class represents the robot and handles its movement, sensors, and interactions
 class Bot:
 
-    def __init__(self,namep,passiveObjectsp,counterp):
+    def __init__(self,namep,passiveObjectsp,counterp,rng=None,room=(ROOM_SIZE, ROOM_SIZE)):
         self.name = namep  # Name of the bot
-        self.x = random.randint(100, 900)  # Initial x-coordinate
-        self.y = random.randint(100, 900)  # Initial y-coordinate
-        self.theta =  random.uniform(0.0, 2.0 * math.pi)  # Initial orientation (angle in radians)
+        self.room = tuple(room)  # (width, height) of the room the bot drives in
+        self.rng = np.random.default_rng() if rng is None else rng  # numpy Generator for all of the bot's randomness
+        self.x, self.y = self.rng.integers(100, 901, size=2).tolist()  # Initial coordinates
+        self.theta = self.rng.uniform(0.0, 2.0 * math.pi)  # Initial orientation (angle in radians)
         self.ll = 60  # Axle width (distance between wheels)
         self.sl = 0.0  # Speed of the left wheel
         self.sr = 0.0  # Speed of the right wheel
-        self.passiveObjects = passiveObjectsp  # List of passive objects (e.g., dirt)
+        if not isinstance(passiveObjectsp, DirtStore):
+            passiveObjectsp = DirtStore.from_objects(passiveObjectsp)
+        self.passiveObjects = passiveObjectsp  # Store of passive objects (e.g., dirt)
         self.counter = counterp  # Counter for collected dirt
+        self.canvas_items = None  # ids of the items draw() created, reused on every redraw
 
     # Think and act method to be called by the brain
     def thinkAndAct(self, agents, passiveObjects):
         """
        Calls the bot's brain to decide the next action and updates the bot's wheel speeds or position.
        :param agents: List of all agents in the environment.
-       :param passiveObjects: List of passive objects in the environment.
+       :param passiveObjects: DirtStore of passive objects in the environment.
        """
         self.sl, self.sr, xx, yy = self.brain.thinkAndAct\
             (self.x, self.y, self.sl, self.sr, self.counter.dirtCollected)
@@ -74,14 +88,16 @@ class Bot:
         self.brain = brainp
 
     #returns the result from the ceiling-mounted dirt camera
-    def map(self):
-        bot_map = np.zeros((10, 10), dtype=np.int16)
-        for p in self.passiveObjects:
-            if isinstance(p,Dirt):
-                xx = int(math.floor(p.centreX/100.0))
-                yy = int(math.floor(p.centreY/100.0))
-                bot_map[xx][yy] += 1
-        return bot_map
+    def map(self, cell_size=DENSITY_CELL_SIZE):
+        """
+        Dirt count per cell, indexed [x cell, y cell]. The grid is maintained by the dirt store and
+        updated in place as dirt is collected, so the same array stays current.
+        :param cell_size: Cell size used if the store has no map yet; an existing map is returned as is.
+        """
+        dirt = self.passiveObjects
+        if dirt.density is None:
+            dirt.enable_density(cell_size, *self.room)
+        return dirt.density
 
     def distance_to(self, obj):
         xx,yy = obj.getLocation()
@@ -102,29 +118,31 @@ class Bot:
         :param cone_angle: The half-angle of the detection cone in radians (e.g., π/4 for 45 degrees).
         :return: A tuple (distance, angle) to the nearest dirt, or (None, None) if no dirt is found.
         """
-        nearest_dirt = None
-        min_distance = float('inf')
-        angle_to_dirt = None
-
-        for obj in self.passiveObjects:
-            if isinstance(obj, Dirt):
-                # Calculate distance to the dirt
-                distance = self.distance_to(obj)
-                if distance <= detection_radius:
-                    # Calculate angle to the dirt
-                    dx = obj.centreX - self.x
-                    dy = obj.centreY - self.y
-                    angle = math.atan2(dy, dx) - self.theta
-                    angle = (angle + math.pi) % (2 * math.pi) - math.pi  # Normalize to [-π, π]
-
-                    # Check if the dirt is within the cone
-                    if abs(angle) <= cone_angle:
-                        if distance < min_distance:
-                            min_distance = distance
-                            nearest_dirt = obj
-                            angle_to_dirt = angle
-
-        return min_distance if nearest_dirt else None, angle_to_dirt
+        # Only dirt in grid cells near the bot can be in range
+        dirt = self.passiveObjects
+        ids = dirt.index.candidates(self.x, self.y, detection_radius)
+        return detect_in_cone(dirt.xs[ids], dirt.ys[ids], self.x, self.y, self.theta,
+                              detection_radius, cone_angle)
+
+    def range_scan(self, num_rays=LIDAR_RAYS, max_range=LIDAR_RANGE, room=None, collision=None,
+                   dirt=False):
+        """
+        Range sensor that complements detect_dirt: rays spread evenly around the bot.
+        :param num_rays: Number of rays.
+        :param max_range: Longest distance measured; rays that hit nothing read max_range.
+        :param room: (width, height) of the room; defaults to the bot's own room.
+        :param collision: Optional CollisionGrid of the room's obstacles.
+        :param dirt: Also measure the distance along each ray to the nearest cell of map() holding dirt.
+        :return: Distances of shape (num_rays,) to the nearest wall or obstacle, or (distances, dirt distances).
+        """
+        room = self.room if room is None else room
+        occupancy = cell_size = density = density_cell_size = None
+        if collision is not None:
+            occupancy, cell_size = collision.occupancy, collision.occupancy_cell_size
+        if dirt:
+            density, density_cell_size = self.map(), self.passiveObjects.density_cell_size
+        return range_scan(self.x, self.y, self.theta, ray_offsets(num_rays), max_range, room[0], room[1],
+                          occupancy, cell_size, density, density_cell_size)
 
     def get_orientation(self):
         """
@@ -137,39 +155,18 @@ class Bot:
     def update(self,canvas,passiveObjects,dt):
         self.move(canvas,dt)
 
-    # draws the robot at its current position
-    def draw(self, canvas, detection_radius=250, fov_angle=math.radians(90)):
+    def shape(self):
+        """
+        Geometry of the bot in canvas coordinates, shared by draw() and the offscreen rasterizer.
+        :return: Dictionary with the body polygon (flat x, y list), the centre, wheel and sensor
+            bounding boxes and the wheel colours.
+        """
         sin_theta = math.sin(self.theta)
         cos_theta = math.cos(self.theta)
         sin_theta_perp = math.sin((math.pi / 2.0) - self.theta)
         cos_theta_perp = math.cos((math.pi / 2.0) - self.theta)
 
-
-
-        # Convert to degrees
-        fov_angle_deg = math.degrees(fov_angle)
-
-        # Adjust orientation and reference direction
-        start_angle = -math.degrees(self.theta) - fov_angle_deg / 2  # Rotate clockwise from bot heading
-
-        # Bounding box
-        bbox = (
-            self.x - detection_radius, self.y - detection_radius,
-            self.x + detection_radius, self.y + detection_radius
-        )
-
-        canvas.create_arc(
-            bbox,
-            start=start_angle,
-            extent=fov_angle_deg,
-            outline="cyan",
-            width=2,
-            style="arc",
-            tags="detection"
-        )
-
-
-# --- Draw bot body ---
+        # --- Bot body ---
         points = [
             self.x + 30 * sin_theta - 30 * sin_theta_perp,
             self.y - 30 * cos_theta - 30 * cos_theta_perp,
@@ -180,7 +177,6 @@ class Bot:
             self.x + 30 * sin_theta + 30 * sin_theta_perp,
             self.y - 30 * cos_theta + 30 * cos_theta_perp,
             ]
-        canvas.create_polygon(points, fill="blue", tags=self.name)
 
         # --- Calculate sensor positions ---
         self.sensorPositions = [
@@ -190,31 +186,72 @@ class Bot:
             self.y + 20 * cos_theta + 30 * cos_theta_perp,
             ]
 
-        # --- Draw bot center ---
-        canvas.create_oval(
-            self.x - 16, self.y - 16, self.x + 16, self.y + 16,
-            fill="gold", tags=self.name
-        )
+        # --- Bot center ---
+        centre = (self.x - 16, self.y - 16, self.x + 16, self.y + 16)
 
-        # --- Draw wheels ---
+        # --- Wheels ---
         wheel_positions = [
             (self.x - 30 * sin_theta, self.y + 30 * cos_theta),  # Left wheel
             (self.x + 30 * sin_theta, self.y - 30 * cos_theta),  # Right wheel
         ]
-        for wx, wy in wheel_positions:
-            canvas.create_oval(
-                wx - 3, wy - 3, wx + 3, wy + 3,
-                fill="red" if wx < self.x else "green", tags=self.name
-            )
+        wheels = [(wx - 3, wy - 3, wx + 3, wy + 3) for wx, wy in wheel_positions]
+        wheel_colours = ["red" if wx < self.x else "green" for wx, _ in wheel_positions]
+
+        # --- Sensors ---
+        sensors = [
+            (self.sensorPositions[i] - 3, self.sensorPositions[i + 1] - 3,
+             self.sensorPositions[i] + 3, self.sensorPositions[i + 1] + 3)
+            for i in range(0, len(self.sensorPositions), 2)
+        ]
+        return {"body": points, "centre": centre, "wheels": wheels, "wheel_colours": wheel_colours,
+                "sensors": sensors}
 
-        # --- Draw sensors ---
-        for i in range(0, len(self.sensorPositions), 2):
-            canvas.create_oval(
-                self.sensorPositions[i] - 3, self.sensorPositions[i + 1] - 3,
-                self.sensorPositions[i] + 3, self.sensorPositions[i + 1] + 3,
-                fill="yellow", tags=self.name
-            )
+    # draws the robot at its current position
+    # The canvas items are created on the first call and only moved afterwards
+    def draw(self, canvas, detection_radius=250, fov_angle=math.radians(90)):
+        # Convert to degrees
+        fov_angle_deg = math.degrees(fov_angle)
 
+        # Adjust orientation and reference direction
+        start_angle = -math.degrees(self.theta) - fov_angle_deg / 2  # Rotate clockwise from bot heading
+
+        # Bounding box
+        bbox = (
+            self.x - detection_radius, self.y - detection_radius,
+            self.x + detection_radius, self.y + detection_radius
+        )
+
+        shape = self.shape()
+        points, centre = shape["body"], shape["centre"]
+        wheels, wheel_colours, sensors = shape["wheels"], shape["wheel_colours"], shape["sensors"]
+
+        items = self.canvas_items
+        if items is None or items["canvas"] is not canvas:
+            self.canvas_items = {
+                "canvas": canvas,
+                "detection": canvas.create_arc(bbox, start=start_angle, extent=fov_angle_deg, outline="cyan",
+                                               width=2, style="arc", tags="detection"),
+                "body": canvas.create_polygon(points, fill="blue", tags=self.name),
+                "centre": canvas.create_oval(centre, fill="gold", tags=self.name),
+                "wheels": [canvas.create_oval(box, fill=colour, tags=self.name)
+                           for box, colour in zip(wheels, wheel_colours)],
+                "sensors": [canvas.create_oval(box, fill="yellow", tags=self.name) for box in sensors],
+            }
+            return
+
+        canvas.coords(items["detection"], *bbox)
+        canvas.itemconfigure(items["detection"], start=start_angle, extent=fov_angle_deg)
+        canvas.coords(items["body"], *points)
+        canvas.coords(items["centre"], *centre)
+        for item, box, colour in zip(items["wheels"], wheels, wheel_colours):
+            canvas.coords(item, *box)
+            canvas.itemconfigure(item, fill=colour)
+        for item, box in zip(items["sensors"], sensors):
+            canvas.coords(item, *box)
+
+    def forget_canvas_items(self):
+        # Call after the canvas was cleared so the next draw() creates fresh items
+        self.canvas_items = None
 
     # handles the physics of the movement
     # cf. Dudek and Jenkin, Computational Principles of Mobile Robotics
@@ -259,49 +296,51 @@ class Bot:
                 self.sr = 0
 
         # Redraw the bot
-        canvas.delete(self.name)
-        canvas.delete("detection")
-        self.draw(canvas)
+        if canvas is not None:
+            self.draw(canvas)
 
     def collectDirt(self, canvas, passiveObjects, count):
         '''
         This function checks if the bot is close to any dirt and collects it.
-        :return: The updated list of passive objects and the number of dirt collected.
+        :return: The dirt store and the number of dirt collected.
         '''
-        toDelete = [idx for idx, rr in enumerate(passiveObjects) if isinstance(rr, Dirt) and self.distance_to(rr) < 30]
-        dirt_collected = len(toDelete)
-
-        for idx in reversed(toDelete):
-            canvas.delete(passiveObjects[idx].name)
-            del passiveObjects[idx]
+        dirt = self.passiveObjects
+        ids = dirt.index.candidates(self.x, self.y, 30)
+        dx = dirt.xs[ids].astype(np.float64) - self.x
+        dy = dirt.ys[ids].astype(np.float64) - self.y
+        toDelete = ids[dx * dx + dy * dy < 30 * 30]
+        dirt_collected = dirt.collect(toDelete)
+
+        if canvas is not None and dirt_collected:
+            dirt.erase(canvas, toDelete)
+        for idx in toDelete:
             count.itemCollected(canvas)
-        return passiveObjects, dirt_collected
+        return dirt, dirt_collected
         
-class Dirt:
-    def __init__(self,namep,xx,yy):
-        self.centreX = xx
-        self.centreY = yy
-        self.name = namep
-
-    def draw(self,canvas):
-        body = canvas.create_oval(self.centreX-1,self.centreY-1,\
-                                  self.centreX+1,self.centreY+1,\
-                                  fill="grey",tags=self.name)
-
-    def getLocation(self):
-        return self.centreX, self.centreY
-
 class Counter:
     def __init__(self):
         self.dirtCollected = 0
         self. totalDirt = 0
+        self.text_item = None  # canvas text showing the count, created on first pickup
+        self.text_canvas = None
+
+    def reset(self, totalDirt, canvas=None):
+        # Start a new episode without replacing the counter or its canvas text
+        self.dirtCollected = 0
+        self.totalDirt = totalDirt
+        if canvas is not None and self.text_item is not None and self.text_canvas is canvas:
+            canvas.itemconfigure(self.text_item, text="")
 
-    def itemCollected(self,canvas):
+    def itemCollected(self,canvas=None):
         self.dirtCollected += 1
-        canvas.delete("dirtCount")
-        canvas.create_text(50,50,anchor="w",\
-                           text="Dirt collected: "+str(self.dirtCollected),\
-                           tags="dirtCount")
+        if canvas is None:
+            return
+        text = "Dirt collected: "+str(self.dirtCollected)
+        if self.text_item is None or self.text_canvas is not canvas:
+            self.text_canvas = canvas
+            self.text_item = canvas.create_text(50,50,anchor="w",text=text,tags="dirtCount")
+        else:
+            canvas.itemconfigure(self.text_item, text=text)
     
 def initialise(window):
     window.resizable(False,False)
@@ -315,58 +354,61 @@ def buttonClicked(x,y,agents):
             rr.x = x
             rr.y = y
 
-def createObjects(canvas, mode='rule-based'):
+def generate_scenario_dirt(rng):
     '''
-
-    :param canvas:
-    :param mode:
-    :return:
+    Lays out the dirt of the createObjects scenario (about 2.5k items in a 1000x1000 room).
+    :param rng: numpy Generator.
+    :return: Integer arrays of x and y coordinates.
     '''
-    agents = []
-    passiveObjects = []
+    xs, ys = [], []
 
     # place line of dirt across top
-    i = 0
     for xx in range(0,10):
-        for _ in range(50+random.randrange(-10,10)):
-            x = xx*100+random.randrange(0,100)
-            y = 0+random.randrange(0,100)
-            dirt = Dirt("Dirt"+str(i),x,y)
-            i += 1
-            passiveObjects.append(dirt)
-            dirt.draw(canvas)
-            
+        n = 50+rng.integers(-10,10)
+        xs.append(xx*100+rng.integers(0,100,n))
+        ys.append(0+rng.integers(0,100,n))
+
     # place line of dirt down side
     for yy in range(1,10):
-        for _ in range(100+random.randrange(-10,10)):
-            x = 9*100+random.randrange(0,100)
-            y = yy*100+random.randrange(0,100)
-            dirt = Dirt("Dirt"+str(i),x,y)
-            i += 1
-            passiveObjects.append(dirt)
-            dirt.draw(canvas)
+        n = 100+rng.integers(-10,10)
+        xs.append(9*100+rng.integers(0,100,n))
+        ys.append(yy*100+rng.integers(0,100,n))
 
     # place less dirt everywhere else
     for xx in range(0,9):
         for yy in range(1,10):
-            for _ in range(10+random.randrange(-3,3)):
-                x = xx*100+random.randrange(0,100)
-                y = yy*100+random.randrange(0,100)
-                dirt = Dirt("Dirt"+str(i),x,y)
-                i += 1
-                passiveObjects.append(dirt)
-                dirt.draw(canvas)
+            n = 10+rng.integers(-3,3)
+            xs.append(xx*100+rng.integers(0,100,n))
+            ys.append(yy*100+rng.integers(0,100,n))
+
+    return np.concatenate(xs), np.concatenate(ys)
+
+def createObjects(canvas, mode='rule-based', rng=None):
+    '''
+
+    :param canvas: Tk canvas to draw on, or None to run headless.
+    :param mode:
+    :param rng: Optional numpy Generator (or seed) for the dirt layout and the bot.
+    :return:
+    '''
+    rng = np.random.default_rng(rng)
+    agents = []
+    xs, ys = generate_scenario_dirt(rng)
+
+    passiveObjects = DirtStore(xs, ys, prefix="Dirt")
+    if canvas is not None:
+        passiveObjects.draw(canvas)
 
     count = Counter()
 
     # place Bot
-    bot = Bot("Bot1",passiveObjects,count)
+    bot = Bot("Bot1",passiveObjects,count,rng)
     brain = Brain(bot, mode)
     bot.setBrain(brain)
     agents.append(bot)
-    bot.draw(canvas)
-
-    canvas.bind( "<Button-1>", lambda event: buttonClicked(event.x,event.y,agents) )
+    if canvas is not None:
+        bot.draw(canvas)
+        canvas.bind( "<Button-1>", lambda event: buttonClicked(event.x,event.y,agents) )
 
 
     return agents, passiveObjects, count
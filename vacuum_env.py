@@ -1,27 +1,125 @@
-import tkinter as tk
-import random
 import math
+import numbers
 import numpy as np
-from vacuum_bot import Counter, Dirt, Bot
+from vacuum_bot import Counter, Bot
+from dirt_store import DirtStore
+from spatial_index import DirtGrid
+from rasterizer import Rasterizer, fit_scale
+from layouts import get_layout
+from floor_coverage import CoverageMap, COVERAGE_CELL_SIZE
+from collision import BOT_CLEARANCE
+from sensors import range_scan_batch, ray_offsets, LIDAR_RANGE
+from profiler import StepProfiler, clock, KINEMATICS, WALLS, COLLECT, DRAW, OBSERVE, COVERAGE
+
+try:
+    import tkinter as tk
+except ImportError:  # headless installs may ship without Tk
+    tk = None
 
 # This class is adapted from the COMP3004 Lab 4 code
 # and is used to create a OpenAi Gym-like environment for the same robot in the lab
 # environment. The environment is a grid of dirt and the robot can move around
 # and collect dirt. The environment is visualised using tkinter.
+# The simulation can run headless or draw offscreen frames, and the room,
+# seeding, number of bots and extra observations are all chosen through the
+# constructor; its docstring describes every option.
+
+RENDER_MODES = (None, "human", "rgb_array")
+# Wheel speeds (left, right) of forward, backward, turn_left and turn_right
+ACTION_SPEEDS = ((10.0, 10.0), (-10.0, -10.0), (-2.5, 2.5), (2.5, -2.5))
+BOT_RADIUS = 30  # bots are treated as circles of this radius when they bump into each other
+WALL_MARGIN = BOT_CLEARANCE
+OBSTACLE_COLOUR = "saddle brown"
+LIDAR_DIRT_CELL_SIZE = 25.0  # dirt map resolution for lidar_dirt unless dirt_map sets one
+PICKUP_RADIUS = 30
 
 class VacuumEnv:
-    def __init__(self, env_id=3, detection_radius=250, fov_angle = 90, max_steps=1000):
-        self_env_layouts = [500, 700, 1000]
-        self.env_size = self_env_layouts[env_id-1]
+    def __init__(self, env_id=3, detection_radius=250, fov_angle = 90, max_steps=1000, render_mode="human",
+                 profile=False, render_every=1, seed=None, layout_pool=0, layout_seed=0, layout=None,
+                 num_bots=1, dirt_map=None, track_coverage=False, lidar_rays=0, lidar_range=LIDAR_RANGE,
+                 lidar_dirt=False):
+        """
+        :param env_id: Key of the room's LayoutSpec in ENV_LAYOUTS (layouts.py).
+        :param detection_radius: Range of the bot's dirt sensor.
+        :param fov_angle: Width of the dirt sensor's cone in degrees.
+        :param max_steps: Steps after which an episode ends.
+        :param render_mode: One of RENDER_MODES. None runs headless: the physics, dirt collection and
+            observations only touch plain Python/NumPy state and no Tk window is created, which is what the
+            training scripts should use. "rgb_array" needs no display either: render() returns the frame as an
+            (H, W, 3) uint8 array drawn by the offscreen Rasterizer.
+        :param profile: Time every phase of step() and each render(); see get_profile().
+        :param render_every: With a window, only redraw the canvas on every render_every-th step.
+        :param seed: Seed of the env's numpy Generator, the source of all randomness (layouts and start pose);
+            reset(seed=...) restarts it. See seeding.spawn_seeds for seeding several environments independently.
+        :param layout_pool: When K > 0, reset() picks one of K layouts generated once per
+            (layout, K, layout_seed) instead of generating a new one.
+        :param layout_seed: Seed of the layout pool.
+        :param layout: LayoutSpec to use instead of the one registered for env_id.
+        :param num_bots: Number of bots sharing the room. With several, step() takes one action per bot and
+            returns (num_bots, ...) observations and (num_bots,) rewards; dirt in reach of several bots goes to
+            the nearest one, and bots that overlap after moving are pushed apart and penalised like a wall hit.
+        :param dirt_map: Cell size (a positive number, not a flag) of a dirt-count grid added to the observation,
+            which then is {"state": vector, "map": grid}. The grid is the dirt store's own array, updated in
+            place as dirt is collected, so it is never copied.
+        :param track_coverage: Stamp the area swept by every move into a CoverageMap (floor_coverage.py) and add
+            the episode's coverage, revisit ratio and the steps it took to reach each threshold to every info.
+        :param lidar_rays: Number of range sensor rays appended to the observation, as distances to the nearest
+            wall or obstacle divided by lidar_range; 0 disables the sensor.
+        :param lidar_range: Longest distance the range sensor measures.
+        :param lidar_dirt: Also append each ray's distance to the nearest map cell holding dirt.
+        Obstacles of the layout block the bot like the walls do: every move is checked against the layout's
+        CollisionGrid (collision.py), the bot stops at the first contact and the step is penalised as a wall hit.
+        """
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"Invalid render mode: {render_mode}")
+        if dirt_map is not None and (isinstance(dirt_map, bool) or not isinstance(dirt_map, numbers.Real)
+                                     or dirt_map <= 0):
+            raise ValueError(f"dirt_map is the map's cell size in canvas units, got {dirt_map!r}")
+        # The room, dirt and start position come from the LayoutSpec of env_id unless one is given
+        self.layout = get_layout(env_id) if layout is None else layout
+        self.width, self.height = self.layout.width, self.layout.height
         self.env_id = env_id
+        self.num_bots = num_bots
+        self.dirt_map_cell = dirt_map
+        self.lidar_rays = lidar_rays
+        self.lidar_range = lidar_range
+        self.lidar_dirt = lidar_dirt
+        self.lidar_offsets = ray_offsets(lidar_rays) if lidar_rays else None
         self.fov_angle = fov_angle
-        self.window = tk.Tk()
-        self.canvas = self.initialise()
+        self.render_mode = render_mode
+        self.render_every = render_every  # render() only redraws every render_every steps
+        self.rng = np.random.default_rng(seed)
+        # Optional pool of pre-generated layouts that reset() samples from instead of generating one
+        self.layout_pool = layout_pool
+        self.layout_seed = layout_seed
+        self.layouts = LayoutPool.get(self.layout, layout_pool, layout_seed) if layout_pool else None
+        self.layout_index = None
+        self.profiler = StepProfiler() if profile else None
+        self.collision = self.layout.collision(WALL_MARGIN) if self.layout.obstacles else None
+        self.coverage = None
+        if track_coverage:
+            blocked = None if self.collision is None else self.collision.rasterize(COVERAGE_CELL_SIZE)
+            self.coverage = CoverageMap(self.width, self.height, blocked=blocked)
+        self._episode_profile = None
+        self.window = None
+        self.canvas = None
+        self.rasterizer = None
+        if render_mode == "rgb_array":
+            self.rasterizer = Rasterizer(self.width, self.height, fit_scale(self.width, self.height),
+                                         self.layout.obstacles)
+        if render_mode == "human":
+            if tk is None:
+                raise RuntimeError("render_mode='human' requires tkinter")
+            self.window = tk.Tk()
+            self.canvas = self.initialise()
         self.agents, self.passive_objects, self.count = self.create_objects()
-        self.bot = self.agents[0]  # Assuming a single bot
+        self.bot = self.agents[0]  # the only bot unless num_bots > 1
+        self.dirt_map = self.passive_objects.density if dirt_map is not None else None
+        if self.coverage is not None:
+            self.coverage.reset([(bot.x, bot.y) for bot in self.agents])
         self.action_space = [0, 1, 2, 3]  # forward, backward, left, right
         self.detection = detection_radius
-        self.state_space = self.update_state()
+        self.update_state()  # sets state_space
         self.max_steps = max_steps
         self.steps_taken = 0
         self.last_action = 5
@@ -29,24 +127,25 @@ class VacuumEnv:
         self.idle_steps = 0
         self.inactive_steps = 0
         self.recently_hit_wall = False
+        self._reset_fleet_state()
 
+    def _reset_fleet_state(self):
+        # Per-bot shaping state and statistics when num_bots > 1
+        self.fleet_last_action = np.full(self.num_bots, 5)
+        self.fleet_inactive_steps = np.zeros(self.num_bots, dtype=np.int64)
+        self.bot_dirt_collected = np.zeros(self.num_bots, dtype=np.int64)
+        self.collisions = 0
 
     def initialise(self):
         """
         Dynamically initializes the canvas based on the environment ID.
         """
         self.window.resizable(False, False)
-        if self.env_id == 1:
-            size = 500
-        elif self.env_id == 2:
-            size = 700
-        elif self.env_id == 3:
-            size = 1000
-        else:
-            raise ValueError("Invalid environment ID")
-
-        self.canvas = tk.Canvas(self.window, width=size, height=size, bg="white")
+        self.canvas = tk.Canvas(self.window, width=self.width, height=self.height, bg="white")
         self.canvas.pack()
+        for polygon in self.layout.obstacles:
+            self.canvas.create_polygon([v for vertex in polygon for v in vertex], fill=OBSTACLE_COLOUR,
+                                       outline="", tags="obstacle")
         return self.canvas
 
     def forward(self):
@@ -58,8 +157,7 @@ class VacuumEnv:
         self.bot.sl = 10.0
         self.bot.sr = 10.0
         self.move(1)
-        self.passive_objects, dirt_collected = self.bot.collectDirt(self.canvas, self.passive_objects, self.count)
-        return dirt_collected
+        return self.collect_dirt()
 
 
     def backward(self):
@@ -70,8 +168,7 @@ class VacuumEnv:
         self.bot.sl = -10.0
         self.bot.sr = -10.0
         self.move(1)
-        self.passive_objects, dirt_collected = self.bot.collectDirt(self.canvas, self.passive_objects, self.count)
-        return dirt_collected
+        return self.collect_dirt()
 
 
     def turn_left(self):
@@ -83,8 +180,7 @@ class VacuumEnv:
         self.bot.sl = -2.5  # Negative speed for left wheel
         self.bot.sr = 2.5   # Positive speed for right wheel
         self.move(1)
-        self.passive_objects, dirt_collected = self.bot.collectDirt(self.canvas, self.passive_objects, self.count)
-        return dirt_collected
+        return self.collect_dirt()
 
 
     def turn_right(self):
@@ -96,20 +192,64 @@ class VacuumEnv:
         self.bot.sl = 2.5   # Positive speed for left wheel
         self.bot.sr = -2.5  # Negative speed for right wheel
         self.move(1)
+        return self.collect_dirt()
+
+
+    def collect_dirt(self):
+        '''
+        Collects any dirt under the bot.
+        :return dirt_collected: The amount of dirt collected.
+        '''
+        prof = self.profiler
+        if prof is not None:
+            start = clock()
         self.passive_objects, dirt_collected = self.bot.collectDirt(self.canvas, self.passive_objects, self.count)
+        if prof is not None:
+            prof.add(COLLECT, clock() - start)
         return dirt_collected
 
+    def get_profile(self):
+        """
+        Returns the per-phase step timings accumulated since construction or reset_profile(),
+        or None when the environment was created without profile=True.
+        """
+        if self.profiler is None:
+            return None
+        return self.profiler.summary()
 
-    def reset(self):
-        # Reset the environment and return the initial observation/state
-        self.canvas.delete("all")
-        self.agents, self.passive_objects, self.count = self.create_objects()
-        self.bot = self.agents[0]
+    def reset_profile(self):
+        if self.profiler is not None:
+            self.profiler.reset()
+            self._episode_profile = self.profiler.snapshot()
+
+    def reset(self, seed=None):
+        """
+        Resets the environment and returns the initial observation/state.
+        :param seed: Optional seed that restarts the env's random stream, so an episode can be reproduced.
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        # Dirt, counter and bot are restored in place rather than reallocated and redrawn
+        self.restore()
         self.steps_taken = 0
+        # Per-episode shaping state, so an episode only depends on its seed and actions
+        self.last_action = 5
+        self.inactive_steps = 0
+        self.recently_hit_wall = False
+        self._reset_fleet_state()
+        if self.coverage is not None:
+            self.coverage.reset([(bot.x, bot.y) for bot in self.agents])
+        if self.profiler is not None:
+            self._episode_profile = self.profiler.snapshot()
         return self.update_state()  # Initial observation/state
 
     def step(self, action):
         # Apply the action and update the environment
+        if self.num_bots > 1:
+            return self.step_fleet(action)
+        prof = self.profiler
+        if prof is not None:
+            prof.start_step()
         if action == 0:
             dirt_collected = self.forward()
             self.inactive_steps = 0
@@ -148,17 +288,24 @@ class VacuumEnv:
 
 
         # Return observation, reward, done, and info
+        if prof is not None:
+            start = clock()
         observation = self.update_state()
+        if prof is not None:
+            prof.add(OBSERVE, clock() - start)
         info = {}
+        if self.coverage is not None:
+            self.coverage.end_step()
+            info.update(self.coverage.info())
 
         # Small reward for searching
-        if observation[3] == 1.0:  # No dirt detected
+        if self.state_space[3] == 1.0:  # No dirt detected
             if action == 0:
                 reward += 0.01
             else:
                 reward += 0.005
 
-        if self.last_distance > observation[3]:
+        if self.last_distance > self.state_space[3]:
             reward += 0.02
         # increment steps taken
         self.steps_taken += 1
@@ -173,167 +320,425 @@ class VacuumEnv:
         )
         self.last_action = action
 
+        if prof is not None:
+            prof.end_step()
+            if done:
+                info["profile"] = prof.summary(since=self._episode_profile)
+
+        return observation, reward, done, info
+
+    def step_fleet(self, actions):
+        """
+        Steps every bot of a multi-robot environment. The reward shaping is the same as step()'s,
+        applied to each bot.
+        :param actions: One action per bot.
+        :return: (observations of shape (num_bots, 5), rewards of shape (num_bots,), done, info) where
+            info holds each bot's dirt collected this step and in total and the collisions this step.
+        """
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_bots)
+        prof = self.profiler
+        if prof is not None:
+            prof.start_step()
+
+        hit = np.zeros(self.num_bots, dtype=bool)
+        for i, (bot, action) in enumerate(zip(self.agents, actions)):
+            bot.sl, bot.sr = ACTION_SPEEDS[action]
+            hit[i] = self.move(1, bot)
+        if prof is not None:
+            start = clock()
+        bumped = self.resolve_collisions()
+        if prof is not None:
+            prof.add(WALLS, clock() - start)
+        dirt_collected = self.collect_fleet_dirt()
+
+        # Same shaping terms as step(), one entry per bot
+        forward, backward, turning = actions == 0, actions == 1, actions >= 2
+        self.fleet_inactive_steps[forward] = 0
+        self.fleet_inactive_steps[turning & (dirt_collected == 0)] += 1
+        self.fleet_inactive_steps[dirt_collected > 0] = 0
+        reward = dirt_collected - 0.01
+        reward[backward] -= 0.1
+        reward[hit | bumped] -= 0.5  # bumping into another bot costs as much as hitting a wall
+        idle = self.fleet_inactive_steps > 50
+        reward[idle] -= 2.0
+        self.fleet_inactive_steps[idle] = 0
+
+        if prof is not None:
+            start = clock()
+        observation = self.update_state()
+        if prof is not None:
+            prof.add(OBSERVE, clock() - start)
+
+        distance = self.state_space.reshape(self.num_bots, -1)[:, 3]
+        no_dirt = distance == 1.0
+        reward[no_dirt & forward] += 0.01
+        reward[no_dirt & ~forward] += 0.005
+        reward[self.last_distance > distance] += 0.02
+        reward[actions == self.fleet_last_action] -= 0.001
+        self.fleet_last_action = actions
+        self.steps_taken += 1
+
+        done = (
+                self.steps_taken >= self.max_steps or
+                self.count.dirtCollected >= self.count.totalDirt
+        )
+        info = {
+            "dirt_collected": dirt_collected,
+            "bot_dirt_collected": self.bot_dirt_collected.copy(),
+            "collisions": int(bumped.sum()),
+        }
+        if self.coverage is not None:
+            self.coverage.end_step()
+            info.update(self.coverage.info())
+        if prof is not None:
+            prof.end_step()
+            if done:
+                info["profile"] = prof.summary(since=self._episode_profile)
         return observation, reward, done, info
 
-    def move(self, dt):
+    def resolve_collisions(self):
+        """
+        Pushes overlapping bots apart along the line between their centres, half the overlap
+        each, stops them and keeps them inside the room. All pairs are checked in one pass, and
+        the floor a bot is pushed over counts towards the coverage like a move.
+        :return: Boolean mask of the bots that bumped into another bot.
+        """
+        pos = np.array([(bot.x, bot.y) for bot in self.agents], dtype=float)
+        delta = pos[:, None, :] - pos[None, :, :]
+        dist = np.sqrt((delta ** 2).sum(axis=2))
+        overlap = 2 * BOT_RADIUS - dist
+        np.fill_diagonal(overlap, 0.0)
+        touching = overlap > 0
+        if not touching.any():
+            return np.zeros(self.num_bots, dtype=bool)
+
+        # Bots on exactly the same spot are separated along the x axis
+        direction = np.where(dist[:, :, None] > 0, delta / np.maximum(dist, 1e-12)[:, :, None], 0.0)
+        same = touching & (dist == 0)
+        direction[same, 0] = np.sign(np.subtract.outer(np.arange(self.num_bots), np.arange(self.num_bots)))[same]
+        push = (np.where(touching, overlap / 2, 0.0)[:, :, None] * direction).sum(axis=1)
+        pos += push
+        np.clip(pos[:, 0], WALL_MARGIN, self.width - WALL_MARGIN, out=pos[:, 0])
+        np.clip(pos[:, 1], WALL_MARGIN, self.height - WALL_MARGIN, out=pos[:, 1])
+
+        bumped = touching.any(axis=1)
+        for bot, (x, y), hit in zip(self.agents, pos, bumped):
+            if hit:
+                # A bot is not pushed into an obstacle; it stays where it stopped instead
+                if self.collision is None or not self.collision.overlaps(x, y):
+                    if self.coverage is not None:
+                        self.coverage.stamp(bot.x, bot.y, float(x), float(y))
+                    bot.x, bot.y = float(x), float(y)
+                bot.sl = bot.sr = 0
+        self.collisions += int(touching.sum()) // 2
+        return bumped
+
+    def collect_fleet_dirt(self):
+        """
+        Collects the dirt under every bot. Dirt within reach of several bots goes to the nearest
+        one (the lower bot index on a tie).
+        :return: Number of dirt collected by each bot.
+        """
+        prof = self.profiler
+        if prof is not None:
+            start = clock()
+        dirt = self.passive_objects
+        owners, ids, dists = [], [], []
+        for i, bot in enumerate(self.agents):
+            cand = dirt.index.candidates(bot.x, bot.y, PICKUP_RADIUS)
+            d2 = (dirt.xs[cand].astype(np.float64) - bot.x) ** 2 + (dirt.ys[cand].astype(np.float64) - bot.y) ** 2
+            near = d2 < PICKUP_RADIUS ** 2
+            owners.append(np.full(int(near.sum()), i))
+            ids.append(cand[near])
+            dists.append(d2[near])
+        owners, ids, dists = np.concatenate(owners), np.concatenate(ids), np.concatenate(dists)
+
+        collected = np.zeros(self.num_bots, dtype=np.int64)
+        if len(ids):
+            order = np.lexsort((owners, dists, ids))  # by dirt id, then distance, then bot index
+            first = np.unique(ids[order], return_index=True)[1]
+            ids, owners = ids[order][first], owners[order][first]
+            dirt.collect(ids)
+            if self.canvas is not None:
+                dirt.erase(self.canvas, ids)
+            for _ in ids:
+                self.count.itemCollected(self.canvas)
+            collected = np.bincount(owners, minlength=self.num_bots)
+            self.bot_dirt_collected += collected
+        if prof is not None:
+            prof.add(COLLECT, clock() - start)
+        return collected
+
+    def move(self, dt, bot=None):
         """
-        Handles the physics of the bot's movement and dynamically adjusts the canvas size based on env_id.
+        Handles the physics of the bot's movement, keeping it inside the room of the layout.
         :param dt: Time step for movement.
+        :param bot: Bot to move; defaults to the first bot.
+        :return: Whether the bot hit a wall.
         """
-        # Dynamically set canvas size based on env_id
-        if self.env_id == 1:
-            canvas_width = canvas_height = 500
-        elif self.env_id == 2:
-            canvas_width = canvas_height = 700
-        elif self.env_id == 3:
-            canvas_width = canvas_height = 1000
-        else:
-            raise ValueError("Invalid environment ID")
+        bot = self.bot if bot is None else bot
+        x0, y0 = bot.x, bot.y
+        canvas_width, canvas_height = self.width, self.height
+        prof = self.profiler
+        if prof is not None:
+            start = clock()
 
         # Straight line movement
-        if self.bot.sl == self.bot.sr:
-            self.bot.x += self.bot.sr * math.cos(self.bot.theta)
-            self.bot.y += self.bot.sr * math.sin(self.bot.theta)
+        if bot.sl == bot.sr:
+            bot.x += bot.sr * math.cos(bot.theta)
+            bot.y += bot.sr * math.sin(bot.theta)
         else:
             # Rotational movement
-            R = (self.bot.ll / 2.0) * ((self.bot.sr + self.bot.sl) / (self.bot.sl - self.bot.sr))
-            omega = (self.bot.sl - self.bot.sr) / self.bot.ll
-            ICCx = self.bot.x - R * math.sin(self.bot.theta)
-            ICCy = self.bot.y + R * math.cos(self.bot.theta)
+            R = (bot.ll / 2.0) * ((bot.sr + bot.sl) / (bot.sl - bot.sr))
+            omega = (bot.sl - bot.sr) / bot.ll
+            ICCx = bot.x - R * math.sin(bot.theta)
+            ICCy = bot.y + R * math.cos(bot.theta)
 
             cos_omega_dt = math.cos(omega * dt)
             sin_omega_dt = math.sin(omega * dt)
 
-            self.bot.x = cos_omega_dt * (self.bot.x - ICCx) - sin_omega_dt * (self.bot.y - ICCy) + ICCx
-            self.bot.y = sin_omega_dt * (self.bot.x - ICCx) + cos_omega_dt * (self.bot.y - ICCy) + ICCy
-            self.bot.theta = (self.bot.theta + omega * dt) % (2.0 * math.pi)
+            bot.x = cos_omega_dt * (bot.x - ICCx) - sin_omega_dt * (bot.y - ICCy) + ICCx
+            bot.y = sin_omega_dt * (bot.x - ICCx) + cos_omega_dt * (bot.y - ICCy) + ICCy
+            bot.theta = (bot.theta + omega * dt) % (2.0 * math.pi)
 
-        # Constrain bot within canvas boundaries
-        if self.bot.x - 25 < 0:  # Left edge
-            self.bot.x = 25
-            self.bot.sl = self.bot.sr = 0
-            self.recently_hit_wall = True
-        elif self.bot.x + 25 > canvas_width:  # Right edge
-            self.bot.x = canvas_width - 25
-            self.bot.sl = self.bot.sr = 0
-            self.recently_hit_wall = True
+        if prof is not None:
+            now = clock()
+            prof.add(KINEMATICS, now - start)
+            start = now
 
-        if self.bot.y - 25 < 0:  # Top edge
-            self.bot.y = 25
-            self.bot.sl = self.bot.sr = 0
-            self.recently_hit_wall = True
-        elif self.bot.y + 25 > canvas_height:  # Bottom edge
-            self.bot.y = canvas_height - 25
-            self.bot.sl = self.bot.sr = 0
+        # Stop at the first obstacle on the way
+        hit_wall = False
+        if self.collision is not None and (bot.x != x0 or bot.y != y0):
+            t = self.collision.sweep(x0, y0, bot.x, bot.y)
+            if t < 1.0:
+                bot.x, bot.y = x0 + t * (bot.x - x0), y0 + t * (bot.y - y0)
+                bot.sl = bot.sr = 0
+                hit_wall = True
+
+        # Constrain bot within canvas boundaries
+        if bot.x - WALL_MARGIN < 0:  # Left edge
+            bot.x = WALL_MARGIN
+            bot.sl = bot.sr = 0
+            hit_wall = True
+        elif bot.x + WALL_MARGIN > canvas_width:  # Right edge
+            bot.x = canvas_width - WALL_MARGIN
+            bot.sl = bot.sr = 0
+            hit_wall = True
+
+        if bot.y - WALL_MARGIN < 0:  # Top edge
+            bot.y = WALL_MARGIN
+            bot.sl = bot.sr = 0
+            hit_wall = True
+        elif bot.y + WALL_MARGIN > canvas_height:  # Bottom edge
+            bot.y = canvas_height - WALL_MARGIN
+            bot.sl = bot.sr = 0
+            hit_wall = True
+
+        if hit_wall and self.num_bots == 1:
+            # step_fleet() penalises wall hits per bot from the return value instead
             self.recently_hit_wall = True
 
-        # Redraw the bot
-        self.canvas.delete(self.bot.name)
-        self.canvas.delete("detection")
-        self.bot.draw(self.canvas, self.detection, math.radians(self.fov_angle))
+        if prof is not None:
+            now = clock()
+            prof.add(WALLS, now - start)
+            start = now
 
-    def create_objects(self):
+        if self.coverage is not None:
+            self.coverage.stamp(x0, y0, bot.x, bot.y)
+            if prof is not None:
+                prof.add(COVERAGE, clock() - start)
+        return hit_wall
 
+    def create_objects(self, dirt=None):
+        """
+        Lays out the dirt and the bot for this env_id.
+        :param dirt: Optional existing DirtStore to refill in place instead of building a new one.
+        :return: The agents, the dirt store and the dirt counter.
+        """
         agents = []
-        passive_objects = []
         count = Counter()
-
-        if self.env_id == 1:
-            # Environment 1 : Small Open room with Grid of dirt
-            size = 500
-            no_dirt = 25
-            dirt_positions = generate_grid_dirt(no_dirt, 100, 500)
-            bot_start = (250, 250) # Centre of canvas
-
-        elif self.env_id == 2:
-            # Environment 2 : Medium Room with Clustered dirt
-            size = 700
-            no_dirt = 20
-            dirt_positions = generate_clustered_dirt(no_dirt, (size//4, size//4), 75)
-            bot_start = (600, 600)
-
-        elif self.env_id == 3:
-            # Environment 3 : Large Room with Randomly Scattered dirt
-            size = 1000
-            no_dirt = 50
-            dirt_positions = generate_random_dirt(no_dirt, 1000)
-            bot_start = generate_random_position(1000)
-
+        xs, ys, bot_start, index = self.next_layout()
+
+        # Create dirt store
+        if dirt is None:
+            passive_objects = DirtStore(xs, ys)
+            if self.dirt_map_cell is not None:
+                passive_objects.enable_density(self.dirt_map_cell, self.width, self.height)
+            elif self.lidar_dirt:
+                passive_objects.enable_density(LIDAR_DIRT_CELL_SIZE, self.width, self.height)
         else:
-            raise ValueError("Invalid environment ID")
-
-        # Create dirt objects
-        for i, (x,y) in enumerate(dirt_positions):
-            dirt = Dirt(f"Dirt_{i}", x, y)
-            passive_objects.append(dirt)
-            dirt.draw(self.canvas)
-        count.totalDirt = no_dirt
+            passive_objects = dirt
+            passive_objects.assign(xs, ys, index)
+        if self.canvas is not None:
+            passive_objects.draw(self.canvas)
+        count.totalDirt = passive_objects.total
 
-        # Place the bot
-        bot = Bot("Bot1", passive_objects, count)
-        bot.x, bot.y = bot_start
-        agents.append(bot)
-        bot.draw(self.canvas)
+        # Place the bots
+        for i, start in enumerate(self.fleet_starts(bot_start)):
+            bot = Bot(f"Bot{i + 1}", passive_objects, count, self.rng, (self.width, self.height))
+            bot.x, bot.y = start
+            agents.append(bot)
+            if self.canvas is not None:
+                bot.draw(self.canvas)
 
 
         return agents, passive_objects, count
 
+    def next_layout(self):
+        """
+        Picks the layout of the next episode: a random entry of the layout pool when the env
+        has one, otherwise a freshly generated layout.
+        :return: Dirt x and y coordinates, the bot's start position and the layout's DirtGrid (or None).
+        """
+        if self.layouts is None:
+            self.layout_index = None
+            xs, ys = self.layout.dirt(self.rng)
+            return xs, ys, self.layout.start(self.rng), None
+        self.layout_index = int(self.rng.integers(len(self.layouts)))
+        return self.layouts[self.layout_index]
+
+    def restore(self):
+        """
+        Starts a new episode in place: the existing dirt store, counter and bot (and their
+        canvas items) are reused and only their state is overwritten.
+        """
+        previous = self.layout_index
+        xs, ys, bot_start, index = self.next_layout()
+        if previous is not None and previous == self.layout_index:
+            self.passive_objects.reset()  # same positions, so the spatial index stays valid
+        else:
+            self.passive_objects.assign(xs, ys, index)
+        self.count.reset(self.passive_objects.total, self.canvas)
+
+        for bot, start in zip(self.agents, self.fleet_starts(bot_start)):
+            bot.x, bot.y = start
+            bot.theta = self.rng.uniform(0.0, 2.0 * math.pi)
+            bot.sl = bot.sr = 0.0
+        if self.canvas is not None:
+            self.passive_objects.draw(self.canvas)
+            for bot in self.agents:
+                bot.draw(self.canvas, self.detection, math.radians(self.fov_angle))
+
+    def fleet_starts(self, first, max_tries=100):
+        """
+        Start positions of all bots: the layout's start for the first bot and random
+        positions that do not overlap earlier bots for the others.
+        """
+        starts = [first]
+        margin = max(self.layout.margin, BOT_RADIUS)
+        for _ in range(self.num_bots - 1):
+            for _ in range(max_tries):
+                x = int(self.rng.integers(margin, self.width - margin + 1))
+                y = int(self.rng.integers(margin, self.height - margin + 1))
+                if all((x - sx) ** 2 + (y - sy) ** 2 >= (2 * BOT_RADIUS) ** 2 for sx, sy in starts) and \
+                        (self.collision is None or not self.collision.overlaps(x, y)):
+                    break
+            starts.append((x, y))  # the room is too crowded if every try overlapped; take the last
+        return starts
+
     def update_state(self):
         # Update the state based on the bot's position and orientation with the distance and angle to the nearest dirt
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        max_distance = math.sqrt(canvas_width**2 + canvas_height**2)
+        if self.num_bots > 1:
+            self.state_space = np.stack([self.observe(bot) for bot in self.agents])
+        else:
+            self.state_space = self.observe(self.bot)
+        if self.lidar_offsets is not None:
+            scan = self.range_scan()
+            self.state_space = np.concatenate([self.state_space, scan if self.num_bots > 1 else scan[0]], axis=-1)
+        if self.dirt_map is None:
+            return self.state_space
+        return {"state": self.state_space, "map": self.dirt_map}
+
+    def range_scan(self):
+        """
+        Lidar readings of every bot, taken in one batched call.
+        :return: Array of shape (num_bots, lidar_rays), or (num_bots, 2 * lidar_rays) with lidar_dirt, with
+            the distances divided by lidar_range.
+        """
+        occupancy = cell_size = density = density_cell_size = None
+        if self.collision is not None:
+            occupancy, cell_size = self.collision.occupancy, self.collision.occupancy_cell_size
+        if self.lidar_dirt:
+            density, density_cell_size = self.passive_objects.density, self.passive_objects.density_cell_size
+        scan = range_scan_batch([bot.x for bot in self.agents], [bot.y for bot in self.agents],
+                                [bot.theta for bot in self.agents], self.lidar_offsets, self.lidar_range,
+                                self.width, self.height, occupancy, cell_size, density, density_cell_size)
+        if self.lidar_dirt:
+            scan = np.concatenate(scan, axis=1)
+        return scan / self.lidar_range
+
+    def observe(self, bot):
+        # Normalise by the layout's room size rather than querying the canvas, so headless and rendered runs agree
+        canvas_width, canvas_height = self.width, self.height
+        max_distance = self.layout.max_distance
 
         # Choose detection FOV based on fov_id
         fov = math.radians(self.fov_angle)
 
-        distance, angle = self.bot.detect_dirt(self.detection, fov)
+        distance, angle = bot.detect_dirt(self.detection, fov)
         distance = distance / max_distance if distance is not None else 1.0
         angle = angle  if angle is not None else 0 # Normalize to [-π, π]
 
-        self.state_space =np.array([
-            self.bot.x / canvas_width,
-            self.bot.y / canvas_height,
-            self.bot.get_orientation(),
+        return np.array([
+            bot.x / canvas_width,
+            bot.y / canvas_height,
+            bot.get_orientation(),
             distance,
             angle
         ])
-        return self.state_space
 
     def render(self):
-        # Render the environment
+        # Render the environment (no-op when running headless or between render_every steps)
+        if self.rasterizer is not None:
+            prof = self.profiler
+            if prof is not None:
+                start = clock()
+            frame = self.rasterizer.render_env(self)
+            if prof is not None:
+                prof.add(DRAW, clock() - start)
+            return frame
+        if self.window is None or self.steps_taken % self.render_every:
+            return
+        prof = self.profiler
+        if prof is not None:
+            start = clock()
+        # Canvas items are moved in place; dirt is erased from its image as it is collected
+        for bot in self.agents:
+            bot.draw(self.canvas, self.detection, math.radians(self.fov_angle))
+        if prof is not None:
+            prof.add(DRAW, clock() - start)
         self.window.update_idletasks()
         self.window.update()
 
     def close(self):
         # Close the environment
-        self.window.destroy()
-
-def generate_grid_dirt(count, spacing, size):
-    dirt = []
-    rows = int(size / spacing)
-    cols = int(size / spacing)
-    for i in range(count):
-        x = (i % cols) * spacing + spacing // 2
-        y = (i // cols) * spacing + spacing // 2
-        dirt.append((x, y))
-    return dirt
-
-def generate_clustered_dirt(count, cluster_center, radius):
-    dirt = []
-    for _ in range(count):
-        x = random.randint(cluster_center[0] - radius, cluster_center[0] + radius)
-        y = random.randint(cluster_center[1] - radius, cluster_center[1] + radius)
-        dirt.append((x, y))
-    return dirt
-
-def generate_random_dirt(count, size):
-    dirt = []
-    for _ in range(count):
-        x = random.randint(30, size-30)
-        y = random.randint(30, size-30)
-        dirt.append((x, y))
-    return dirt
-
-def generate_random_position(size):
-    return random.randint(30, size-30), random.randint(30, size-30)
\ No newline at end of file
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
+            self.canvas = None
+
+class LayoutPool:
+    # Pre-generated layouts of one LayoutSpec, stored as (size, num_dirt) coordinate arrays together
+    # with the spatial index of each layout, so a reset only copies them into the dirt store
+    _pools = {}  # (spec, size, seed) -> pool, shared by every env in the process
+
+    def __init__(self, layout, size, seed=0):
+        rng = np.random.default_rng(seed)
+        xs, ys = layout.dirt(rng, size)
+        self.xs = np.ascontiguousarray(xs, dtype=np.float32)
+        self.ys = np.ascontiguousarray(ys, dtype=np.float32)
+        self.starts = list(zip(*layout.start(rng, size)))
+        self.indexes = [DirtGrid(x, y) for x, y in zip(self.xs, self.ys)]
+
+    @classmethod
+    def get(cls, layout, size, seed=0):
+        key = (layout, size, seed)
+        if key not in cls._pools:
+            cls._pools[key] = cls(layout, size, seed)
+        return cls._pools[key]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        return self.xs[index], self.ys[index], self.starts[index], self.indexes[index]
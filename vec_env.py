@@ -0,0 +1,219 @@
+import math
+import numpy as np
+
+from sensors import detect_in_cone_batch
+from layouts import get_layout
+
+# Batched version of VacuumEnv: N independent copies of the same layout are
+# held in stacked NumPy arrays and stepped together with one call. The physics,
+# dirt pickup, cone detection and reward shaping mirror VacuumEnv.step so that
+# agents trained here behave the same in the Tk environment. Layouts come from
+# the same LayoutSpec as VacuumEnv's env_id (or layout=).
+
+# Wheel speeds (left, right) for forward, backward, left and right
+ACTION_SPEEDS = np.array([
+    [10.0, 10.0],
+    [-10.0, -10.0],
+    [-2.5, 2.5],
+    [2.5, -2.5],
+])
+
+AXLE_WIDTH = 60      # Bot.ll
+WALL_MARGIN = 25     # VacuumEnv.move keeps the bot this far from the walls
+PICKUP_RADIUS = 30   # Bot.collectDirt
+
+
+class VecVacuumEnv:
+    def __init__(self, num_envs, env_id=3, detection_radius=250, fov_angle=90, max_steps=1000, seed=None,
+                 layout=None):
+        self.layout = get_layout(env_id) if layout is None else layout
+        if self.layout.obstacles:
+            raise ValueError("VecVacuumEnv does not simulate obstacles; use VacuumEnv for this layout")
+        self.num_envs = num_envs
+        self.env_id = env_id
+        self.width, self.height = self.layout.width, self.layout.height
+        self.detection = detection_radius
+        self.fov_angle = fov_angle
+        self.max_steps = max_steps
+        self.action_space = [0, 1, 2, 3]  # forward, backward, left, right
+        self.rng = np.random.default_rng(seed)
+
+        self.num_dirt = self._generate_dirt(1)[0].shape[1]
+
+        # Bot pose and wheel speeds
+        self.x = np.zeros(num_envs)
+        self.y = np.zeros(num_envs)
+        self.theta = np.zeros(num_envs)
+        self.sl = np.zeros(num_envs)
+        self.sr = np.zeros(num_envs)
+
+        # Dirt positions and alive masks, one row per environment
+        self.dirt_x = np.zeros((num_envs, self.num_dirt), dtype=np.float32)
+        self.dirt_y = np.zeros((num_envs, self.num_dirt), dtype=np.float32)
+        self.dirt_alive = np.zeros((num_envs, self.num_dirt), dtype=bool)
+
+        # Per-episode bookkeeping that VacuumEnv keeps as scalars
+        self.dirt_collected = np.zeros(num_envs, dtype=np.int64)
+        self.steps_taken = np.zeros(num_envs, dtype=np.int64)
+        self.inactive_steps = np.zeros(num_envs, dtype=np.int64)
+        self.last_action = np.full(num_envs, 5, dtype=np.int64)
+
+        self.state_space = np.zeros((num_envs, 5))
+
+    def _generate_dirt(self, n):
+        """
+        Generates dirt positions for n copies of the layout.
+        :return: Arrays of x and y coordinates with shape (n, num_dirt).
+        """
+        return self.layout.dirt(self.rng, n)
+
+    def _generate_start(self, n):
+        return self.layout.start(self.rng, n)
+
+    def _reset_envs(self, idx):
+        n = len(idx)
+        if n == 0:
+            return
+        self.dirt_x[idx], self.dirt_y[idx] = self._generate_dirt(n)
+        self.dirt_alive[idx] = True
+        self.x[idx], self.y[idx] = self._generate_start(n)
+        self.theta[idx] = self.rng.uniform(0.0, 2.0 * math.pi, size=n)
+        self.sl[idx] = 0.0
+        self.sr[idx] = 0.0
+        self.dirt_collected[idx] = 0
+        self.steps_taken[idx] = 0
+        self.inactive_steps[idx] = 0
+        self.last_action[idx] = 5
+
+    def reset(self):
+        # Reset every environment and return the stacked initial observations
+        self._reset_envs(np.arange(self.num_envs))
+        return self.update_state()
+
+    def move(self, dt=1.0):
+        """
+        Applies the differential drive kinematics of VacuumEnv.move to every bot.
+        :return: Boolean mask of the bots that hit a wall.
+        """
+        straight = self.sl == self.sr
+        turning = ~straight
+
+        self.x = np.where(straight, self.x + self.sr * np.cos(self.theta), self.x)
+        self.y = np.where(straight, self.y + self.sr * np.sin(self.theta), self.y)
+
+        if turning.any():
+            sl, sr = self.sl[turning], self.sr[turning]
+            x, y, theta = self.x[turning], self.y[turning], self.theta[turning]
+            R = (AXLE_WIDTH / 2.0) * ((sr + sl) / (sl - sr))
+            omega = (sl - sr) / AXLE_WIDTH
+            ICCx = x - R * np.sin(theta)
+            ICCy = y + R * np.cos(theta)
+            cos_omega_dt = np.cos(omega * dt)
+            sin_omega_dt = np.sin(omega * dt)
+            # VacuumEnv.move updates x before computing y; keep the same order
+            x = cos_omega_dt * (x - ICCx) - sin_omega_dt * (y - ICCy) + ICCx
+            y = sin_omega_dt * (x - ICCx) + cos_omega_dt * (y - ICCy) + ICCy
+            self.x[turning], self.y[turning] = x, y
+            self.theta[turning] = (theta + omega * dt) % (2.0 * math.pi)
+
+        # Constrain bots within the room
+        low, high_x, high_y = WALL_MARGIN, self.width - WALL_MARGIN, self.height - WALL_MARGIN
+        hit_wall = (self.x < low) | (self.x > high_x) | (self.y < low) | (self.y > high_y)
+        np.clip(self.x, low, high_x, out=self.x)
+        np.clip(self.y, low, high_y, out=self.y)
+        self.sl[hit_wall] = 0.0
+        self.sr[hit_wall] = 0.0
+        return hit_wall
+
+    def collect_dirt(self):
+        """
+        Removes dirt within pickup range of each bot.
+        :return: Number of dirt collected in each environment.
+        """
+        dx = self.dirt_x - self.x[:, None]
+        dy = self.dirt_y - self.y[:, None]
+        picked = self.dirt_alive & (dx * dx + dy * dy < PICKUP_RADIUS ** 2)
+        self.dirt_alive &= ~picked
+        collected = picked.sum(axis=1)
+        self.dirt_collected += collected
+        return collected
+
+    def detect_dirt(self):
+        """
+        Finds the nearest alive dirt inside each bot's detection cone.
+        :return: Arrays (distance, angle) with NaN where no dirt is visible.
+        """
+        return detect_in_cone_batch(self.dirt_x, self.dirt_y, self.dirt_alive, self.x, self.y, self.theta,
+                                    self.detection, math.radians(self.fov_angle))
+
+    def update_state(self):
+        # Same observation as VacuumEnv.update_state, one row per environment
+        max_distance = self.layout.max_distance
+        distance, angle = self.detect_dirt()
+        found = ~np.isnan(distance)
+
+        self.state_space = np.stack([
+            self.x / self.width,
+            self.y / self.height,
+            self.theta % (2 * math.pi),
+            np.where(found, distance / max_distance, 1.0),
+            np.where(found, angle, 0.0),
+        ], axis=1)
+        return self.state_space
+
+    def step(self, actions):
+        """
+        Steps every environment with its action and auto-resets finished episodes.
+        :param actions: Integer array of shape (num_envs,).
+        :return: (observations, rewards, dones, infos). For finished environments the
+            returned observation is the first one of the next episode; the final
+            observation is in infos["terminal_observation"].
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        self.sl, self.sr = ACTION_SPEEDS[actions].T.copy()
+        hit_wall = self.move(1)
+        dirt_collected = self.collect_dirt()
+
+        forward = actions == 0
+        turning = (actions == 2) | (actions == 3)
+        self.inactive_steps[forward] = 0
+        self.inactive_steps[turning & (dirt_collected == 0)] += 1
+        self.inactive_steps[dirt_collected > 0] = 0
+
+        rewards = dirt_collected - 0.01  # penalty for action
+        rewards -= 0.1 * (actions == 1)  # penalty for moving backward
+        rewards -= 0.5 * hit_wall        # penalty for hitting edges
+
+        # Penalty for inactivity
+        inactive = self.inactive_steps > 50
+        rewards -= 2.0 * inactive
+        self.inactive_steps[inactive] = 0
+
+        observations = self.update_state()
+
+        # Small reward for searching
+        searching = observations[:, 3] == 1.0
+        rewards += np.where(searching, np.where(forward, 0.01, 0.005), 0.0)
+        # VacuumEnv.last_distance is never updated, so any sighting earns the bonus
+        rewards += 0.02 * (observations[:, 3] < 1.0)
+
+        self.steps_taken += 1
+        rewards -= 0.001 * (actions == self.last_action)
+        self.last_action = actions.copy()
+
+        dones = (self.steps_taken >= self.max_steps) | (self.dirt_collected >= self.num_dirt)
+        infos = {
+            "dirt_collected": self.dirt_collected.copy(),
+            "steps_taken": self.steps_taken.copy(),
+            "terminal_observation": observations.copy(),
+        }
+
+        done_idx = np.flatnonzero(dones)
+        if len(done_idx):
+            self._reset_envs(done_idx)
+            observations = self.update_state()
+
+        return observations, rewards, dones, infos
+
+    def close(self):
+        pass